@@ -5,21 +5,57 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from config import Config
-
-db = SQLAlchemy()
+from app.category_cache import CategoryCache
+from app.response_cache import ResponseCache
+from app.passwords import PasswordHasher
+from app.advice_cache import AdviceCache
+from app.llm import LLMClient
+from app import db_tuning, json_provider
+from app.db_routing import RoutingSession
+from app.advice_jobs import AdviceJobQueue
+from app.compression import Compression
+from app.instrumentation import Instrumentation
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
+category_cache = CategoryCache()
+response_cache = ResponseCache()
+password_hasher = PasswordHasher()
+advice_cache = AdviceCache()
+llm_client = LLMClient()
+advice_jobs = AdviceJobQueue()
+compression = Compression()
+metrics = Instrumentation()
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    json_provider.init_app(app)
 
     # 将原来的 CORS(app) 替换为下面这行更详细的配置
     # 这会明确告诉浏览器，允许所有来源，并支持携带cookies等凭证
     CORS(app, supports_credentials=True)
 
+    if app.config.get("DB_ENGINE_PROFILE") == "production":
+        app.config.setdefault(
+            "SQLALCHEMY_ENGINE_OPTIONS", db_tuning.engine_options(app.config)
+        )
     db.init_app(app)
+    if app.config.get("DB_ENGINE_PROFILE") == "production":
+        with app.app_context():
+            for engine in db.engines.values():
+                db_tuning.install_sqlite_pragmas(engine, app.config)
     migrate.init_app(app, db)
+    category_cache.init_app(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    advice_cache.init_app(app)
+    llm_client.init_app(app)
+    advice_jobs.init_app(app)
+    # 先于 compression 注册: after_request 逆序执行，这样延迟包含压缩的耗时
+    metrics.init_app(app)
+    compression.init_app(app)
 
     # --- 后面的蓝图等部分保持不变 ---
     from app.api.auth import bp as auth_bp
@@ -42,10 +78,25 @@ def create_app(config_class=Config):
 
     app.register_blueprint(advice_bp, url_prefix="/api")
 
+    from app.api.analytics import bp as analytics_bp
+
+    app.register_blueprint(analytics_bp, url_prefix="/api")
+
+    from app.api.metrics import bp as metrics_bp
+
+    app.register_blueprint(metrics_bp, url_prefix="/api")
+
     from app import models
+    from app import rollups  # 注册维护 daily_rollups 的 mapper 事件
+    from app import search  # 注册 create_all 时创建全文索引表的 DDL 事件
     from app import commands
 
     app.cli.add_command(commands.seed_command)
+    app.cli.add_command(commands.rebuild_rollups_command)
+    app.cli.add_command(commands.import_transactions_command)
+    app.cli.add_command(commands.gen_data_command)
+    app.cli.add_command(commands.db_tune_command)
+    app.cli.add_command(commands.sync_replica_command)
 
     @app.route("/test")
     def test_route():
@@ -0,0 +1,40 @@
+# app/advice_cache.py
+"""AI 建议的结果缓存。
+
+缓存键是发送给模型的完整消息 (系统提示词 + 聚合后的消费数据) 的哈希，
+同一份数据再次请求时直接返回上次生成的建议，不再调用模型。
+数据发生变化时 Prompt 随之变化，自然落到新的缓存键上。
+"""
+
+import hashlib
+import json
+
+from app.response_cache import MemoryBackend
+
+
+class AdviceCache:
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = MemoryBackend(
+            max_entries=app.config.get("ADVICE_CACHE_MAX_ENTRIES", 512),
+            ttl=app.config.get("ADVICE_CACHE_TTL", 3600),
+        )
+
+    @staticmethod
+    def key_for(model, messages):
+        payload = json.dumps(
+            {"model": model, "messages": messages},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, advice):
+        self.backend.set(key, advice)
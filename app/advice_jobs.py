@@ -0,0 +1,140 @@
+# app/advice_jobs.py
+"""后台生成 AI 建议的任务队列。
+
+POST /api/advice 只负责汇总数据、构建 Prompt 并提交任务，立即返回任务 id；
+模型调用在有界线程池中执行，客户端通过 GET /api/advice/jobs/<id> 轮询结果。
+同一用户对同一时间范围的重复请求，在前一个任务完成之前会合并为同一个任务。
+
+任务状态和去重记录保存在单独的存储中 (ADVICE_JOB_BACKEND，有自己的容量和
+ADVICE_JOB_TTL)，不会因为接口响应缓存写满或过期而丢失进行中的任务。默认的
+sqlite 后端由所有 worker 进程共享，轮询请求落到哪个进程都能查到任务，重复提交
+也能跨进程合并；memory 后端只适合单进程部署。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.response_cache import create_backend
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class AdviceQueueFull(Exception):
+    """排队中的任务过多"""
+
+
+class AdviceJobQueue:
+    def __init__(self, app=None):
+        self._llm = None
+        self._store = None
+        self._cache = None
+        self._executor = None
+        self._queue_limit = 0
+        self._lock = threading.Lock()
+        self._inflight = set()  # 本进程线程池中尚未结束的 job_id，用于限制排队数量
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import advice_cache, llm_client
+
+        self._llm = llm_client
+        self._store = create_backend(
+            app.config.get("ADVICE_JOB_BACKEND", "sqlite"),
+            max_entries=app.config.get("ADVICE_JOB_MAX_ENTRIES", 10000),
+            ttl=app.config.get("ADVICE_JOB_TTL", 3600),
+            path=app.config.get("ADVICE_JOB_STORE_PATH")
+            or os.path.join(app.instance_path, "advice_jobs.db"),
+        )
+        self._cache = advice_cache
+        workers = app.config.get("ADVICE_WORKERS", 4)
+        self._queue_limit = app.config.get("ADVICE_QUEUE_LIMIT", 32)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="advice"
+        )
+        with self._lock:
+            self._inflight.clear()
+
+    # --- 任务状态读写 ---
+    def get(self, job_id):
+        raw = self._store.get(f"advice-job:{job_id}")
+        return json.loads(raw) if raw is not None else None
+
+    def _save(self, job):
+        self._store.set(f"advice-job:{job['id']}", json.dumps(job, ensure_ascii=False))
+
+    def _new_job(self, user_id, status, **fields):
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": status,
+            "advice": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        job.update(fields)
+        self._save(job)
+        return job
+
+    # --- 提交任务 ---
+    def completed(self, user_id, advice):
+        """不需要调用模型 (无数据或命中缓存) 时直接创建一个已完成的任务"""
+        return self._new_job(user_id, DONE, advice=advice)
+
+    def submit(self, user_id, dedupe_key, model, messages, cache_key):
+        """提交一个生成任务；相同 (user_id, dedupe_key) 的任务正在进行时直接复用"""
+        inflight_key = "advice-inflight:" + json.dumps([user_id, dedupe_key])
+        with self._lock:
+            job_id = self._store.get(inflight_key)
+            if job_id is not None:
+                job = self.get(job_id)
+                if job is not None and job["status"] in (PENDING, RUNNING):
+                    return job
+                # 记录已经过期、被淘汰或任务已结束，按没有进行中的任务处理
+                self._store.delete(inflight_key)
+            if len(self._inflight) >= self._queue_limit:
+                raise AdviceQueueFull()
+            job = self._new_job(user_id, PENDING)
+            self._inflight.add(job["id"])
+            self._store.set(inflight_key, job["id"])
+
+        try:
+            # 后台线程修改的是副本，返回给调用方的是提交时的快照
+            self._executor.submit(
+                self._run, dict(job), inflight_key, model, messages, cache_key
+            )
+        except Exception:
+            self._finish(job["id"], inflight_key)
+            raise
+        return job
+
+    def _finish(self, job_id, inflight_key):
+        with self._lock:
+            self._inflight.discard(job_id)
+            # 记录丢失后同一键可能已经提交了新任务，只清除自己的
+            if self._store.get(inflight_key) == job_id:
+                self._store.delete(inflight_key)
+
+    def _run(self, job, inflight_key, model, messages, cache_key):
+        job["status"] = RUNNING
+        self._save(job)
+        try:
+            advice = self._llm.complete(model, messages)
+        except Exception as e:
+            job.update(status=FAILED, error=str(e))
+        else:
+            job.update(status=DONE, advice=advice)
+            self._cache.set(cache_key, advice)
+        finally:
+            job["finished_at"] = time.time()
+            self._save(job)
+            self._finish(job["id"], inflight_key)
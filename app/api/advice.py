@@ -1,31 +1,38 @@
 # app/api/advice.py (通义千问版本)
 
-from openai import OpenAI
-from flask import Blueprint, request, jsonify, current_app
-from app.models import Transaction
-from .decorators import token_required
+import json
+
+from flask import Blueprint, Response, request, jsonify, url_for
+from app.models import DailyRollup
+from app import db, category_cache, advice_cache, advice_jobs, llm_client
+from app.advice_jobs import AdviceQueueFull, DONE, FAILED
+from app.llm import LLMBusy
+from app.money import format_cents
+from sqlalchemy import func
+from .decorators import token_required, read_only
 from datetime import datetime
 
 bp = Blueprint("advice", __name__)
 
 
+MODEL = "qwen-plus"
+SYSTEM_PROMPT = (
+    "你是一位专业的财务规划师。"
+    "请根据用户提供的数据，为他提供一份简短、友好、口语化的财务分析和建议。"
+    "请注意：1. 分析主要消费领域。 2. 提出1-2个具体省钱建议。 3. 全文多使用 emoji。 4. 总结时给一些鼓励。"
+)
+
+
 @bp.route("/advice", methods=["POST"])
 @token_required
+@read_only
 def get_financial_advice(current_user):
-    """根据用户指定时间范围的消费数据，生成AI财务建议 (由通义千问驱动)"""
+    """根据用户指定时间范围的消费数据，提交生成AI财务建议的后台任务 (由通义千问驱动)
 
-    # 1. 初始化通义千问客户端
-    try:
-        client = OpenAI(
-            api_key=current_app.config["DASHSCOPE_API_KEY"],
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
-    except Exception as e:
-        return jsonify(
-            {"error": "AI service configuration failed", "details": str(e)}
-        ), 500
+    带上 ?stream=1 时不创建后台任务，而是以 Server-Sent Events 逐段返回生成的文本。
+    """
 
-    # 2. 获取并验证请求数据 (逻辑不变)
+    # 1. 获取并验证请求数据 (逻辑不变)
     data = request.get_json()
     start_date_str = data.get("start_date")
     end_date_str = data.get("end_date")
@@ -35,59 +42,161 @@ def get_financial_advice(current_user):
 
     start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
     end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+    stream = request.args.get("stream") == "1"
 
-    # 3. 查询时间范围内的消费数据 (逻辑不变)
-    transactions = Transaction.query.filter(
-        Transaction.user_id == current_user.id,
-        Transaction.transaction_date.between(start_date, end_date),
-    ).all()
+    messages = _build_messages(
+        current_user.id, start_date, end_date, start_date_str, end_date_str
+    )
+    if messages is None:
+        empty_advice = "📈 这段时间内没有消费记录，无法生成建议。继续保持！"
+        if stream:
+            return _sse_response([_sse_event("done", {"advice": empty_advice})])
+        return _job_response(advice_jobs.completed(current_user.id, empty_advice))
+
+    # 4. 同样的数据之前已经生成过建议时直接返回，不再调用模型
+    cache_key = advice_cache.key_for(MODEL, messages)
+    cached_advice = advice_cache.get(cache_key)
+    if cached_advice is not None:
+        if stream:
+            return _sse_response([_sse_event("done", {"advice": cached_advice})])
+        return _job_response(advice_jobs.completed(current_user.id, cached_advice))
+
+    if stream:
+        return _stream_advice(messages, cache_key)
+
+    # 5. 提交后台任务并立即返回任务 id，客户端轮询 /advice/jobs/<id> 获取结果
+    try:
+        job = advice_jobs.submit(
+            current_user.id,
+            (start_date_str, end_date_str),
+            MODEL,
+            messages,
+            cache_key,
+        )
+    except AdviceQueueFull:
+        return _busy_response()
+    return _job_response(job)
 
-    if not transactions:
-        return jsonify(
-            {"advice": "📈 这段时间内没有消费记录，无法生成建议。继续保持！"}
-        ), 200
 
-    # 4. 构建 Prompt (逻辑不变，只是将结果喂给不同的模型)
+def _build_messages(user_id, start_date, end_date, start_date_str, end_date_str):
+    """汇总时间范围内的数据并构建 Prompt；没有任何记录时返回 None"""
+    # 2. 在数据库中按 (类型, 分类) 汇总时间范围内的金额 (分)，只返回寥寥几行
+    totals = (
+        db.session.query(
+            DailyRollup.type, DailyRollup.category_id, func.sum(DailyRollup.total_cents)
+        )
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.date.between(start_date, end_date),
+        )
+        .group_by(DailyRollup.type, DailyRollup.category_id)
+        .all()
+    )
+
+    if not totals:
+        return None
+
+    # 3. 构建 Prompt (逻辑不变，只是将结果喂给不同的模型)
     user_data_prompt = (
         f"我在 {start_date_str} 到 {end_date_str} 期间的消费数据如下：\n\n"
     )
     total_expense = 0
     expenses_by_category = {}
+    # 分类名称从缓存中取，同名分类合并
+    category_names = category_cache.names_for_user(user_id)
 
-    for t in transactions:
-        if t.type == "expense":
-            category_name = t.category.name if t.category else "未分类"
-            total_expense += t.amount
+    for tx_type, category_id, total in totals:
+        if tx_type == "expense":
+            category_name = category_names.get(category_id, "未分类")
+            total_expense += total
             if category_name not in expenses_by_category:
                 expenses_by_category[category_name] = 0
-            expenses_by_category[category_name] += t.amount
+            expenses_by_category[category_name] += total
 
-    user_data_prompt += f"总支出：{total_expense:.2f}元。\n"
+    user_data_prompt += f"总支出：{format_cents(total_expense)}元。\n"
     user_data_prompt += "各项支出分类如下：\n"
-    for category, amount in expenses_by_category.items():
-        user_data_prompt += f"- {category}: {amount:.2f}元\n"
+    # 按金额从高到低排列，保证同样的数据总是生成同样的 Prompt
+    for category, amount in sorted(
+        expenses_by_category.items(), key=lambda item: (-item[1], item[0])
+    ):
+        user_data_prompt += f"- {category}: {format_cents(amount)}元\n"
 
-    # 5. 调用 AI 模型并返回结果
-    try:
-        completion = client.chat.completions.create(
-            model="qwen-plus",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "你是一位专业的财务规划师。"
-                        "请根据用户提供的数据，为他提供一份简短、友好、口语化的财务分析和建议。"
-                        "请注意：1. 分析主要消费领域。 2. 提出1-2个具体省钱建议。 3. 全文多使用 emoji。 4. 总结时给一些鼓励。"
-                    ),
-                },
-                {"role": "user", "content": user_data_prompt},
-            ],
-        )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_data_prompt},
+    ]
 
-        advice_text = completion.choices[0].message.content
-        return jsonify({"advice": advice_text})
 
+def _stream_advice(messages, cache_key):
+    """把模型的流式输出转发为 SSE；客户端断开时关闭上游请求"""
+    try:
+        upstream = llm_client.stream(MODEL, messages)
+    except LLMBusy:
+        return _busy_response()
     except Exception as e:
         return jsonify(
             {"error": "Failed to generate AI advice", "details": str(e)}
-        ), 503
+        ), 502
+
+    def generate():
+        parts = []
+        try:
+            for delta in upstream:
+                parts.append(delta)
+                yield _sse_event("delta", {"text": delta})
+        except Exception as e:
+            yield _sse_event(
+                "error", {"error": "Failed to generate AI advice", "details": str(e)}
+            )
+            return
+        advice = "".join(parts)
+        advice_cache.set(cache_key, advice)
+        yield _sse_event("done", {"advice": advice})
+
+    response = _sse_response(generate())
+    # 客户端断开后 WSGI 服务器会关闭响应，此时同时关闭上游的流式请求
+    response.call_on_close(upstream.close)
+    return response
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events):
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # 关闭 nginx 等反向代理的缓冲，保证每段文本立即到达客户端
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _busy_response():
+    response = jsonify({"error": "Too many advice requests, please retry later"})
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+
+@bp.route("/advice/jobs/<job_id>", methods=["GET"])
+@token_required
+def get_advice_job(current_user, job_id):
+    """查询 AI 建议任务的状态与结果"""
+    job = advice_jobs.get(job_id)
+    if job is None or job["user_id"] != current_user.id:
+        return jsonify({"error": "Job not found"}), 404
+    return _job_response(job)
+
+
+def _job_response(job):
+    body = {"job_id": job["id"], "status": job["status"]}
+    if job["status"] == DONE:
+        body["advice"] = job["advice"]
+        return jsonify(body), 200
+    if job["status"] == FAILED:
+        body["error"] = "Failed to generate AI advice"
+        body["details"] = job["error"]
+        return jsonify(body), 200
+
+    response = jsonify(body)
+    response.headers["Location"] = url_for("advice.get_advice_job", job_id=job["id"])
+    return response, 202
@@ -0,0 +1,99 @@
+from flask import Blueprint, request, jsonify
+from app import analytics, category_cache, response_cache
+from app.money import format_cents
+from .decorators import token_required, read_only
+from datetime import datetime, timedelta
+import numpy as np
+
+bp = Blueprint("analytics", __name__)
+
+# 默认返回最近一年
+DEFAULT_RANGE_DAYS = 365
+DEFAULT_WINDOW = 3
+
+
+def _money(cents):
+    return [format_cents(c) for c in cents.tolist()]
+
+
+@bp.route("/analytics/series", methods=["GET"])
+@token_required
+@response_cache.cached("analytics")
+@read_only
+def get_series(current_user):
+    """按天/周/月/年汇总的收支时间序列
+
+    参数: granularity=day|week|month|year (默认 month)，start、end (YYYY-MM-DD，
+    默认最近一年)，group_by=type|category (默认 type)，window=移动平均的桶数 (默认 3)。
+    没有数据的时间桶补 0；balance 为从 start 开始的累计余额。
+    """
+    granularity = request.args.get("granularity", "month")
+    if granularity not in analytics.GRANULARITIES:
+        return jsonify({"error": "granularity must be day, week, month or year"}), 400
+    group_by = request.args.get("group_by", "type")
+    if group_by not in analytics.GROUP_BY:
+        return jsonify({"error": "group_by must be type or category"}), 400
+
+    try:
+        end = (
+            datetime.strptime(request.args["end"], "%Y-%m-%d").date()
+            if request.args.get("end")
+            else datetime.utcnow().date()
+        )
+        start = (
+            datetime.strptime(request.args["start"], "%Y-%m-%d").date()
+            if request.args.get("start")
+            else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        )
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    if len(analytics.bucket_range(start, end, granularity)) > analytics.MAX_BUCKETS:
+        return jsonify(
+            {"error": f"Range covers more than {analytics.MAX_BUCKETS} buckets"}
+        ), 400
+
+    window = request.args.get("window", DEFAULT_WINDOW, type=int)
+    if window < 1:
+        return jsonify({"error": "window must be positive"}), 400
+
+    result = analytics.build_series(
+        current_user.id, start, end, granularity, group_by, window
+    )
+
+    if group_by == "category":
+        category_names = category_cache.names_for_user(current_user.id)
+        labels = [category_names.get(key, "未分类") for key in result["keys"]]
+        keys = [key or None for key in result["keys"]]
+    else:
+        labels = keys = result["keys"]
+
+    series = [
+        {
+            "key": key,
+            "name": label,
+            "total": format_cents(int(values.sum())),
+            "values": _money(values),
+            "moving_average": [f"{v / 100:.2f}" for v in average.tolist()],
+        }
+        for key, label, values, average in zip(
+            keys, labels, result["values"], result["moving_average"]
+        )
+    ]
+
+    return jsonify(
+        {
+            "granularity": granularity,
+            "group_by": group_by,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "window": window,
+            "buckets": np.datetime_as_string(result["buckets"]).tolist(),
+            "series": series,
+            "income": _money(result["income"]),
+            "expense": _money(result["expense"]),
+            "net": _money(result["net"]),
+            "balance": _money(result["balance"]),
+        }
+    )
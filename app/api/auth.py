@@ -2,12 +2,19 @@ import jwt
 from flask import Blueprint, request, jsonify, current_app
 from app.models import User
 from app import db
+from app.passwords import PasswordHasherBusy
 from datetime import datetime, timedelta, timezone
 
 # 创建一个名为 'auth' 的蓝图
 bp = Blueprint("auth", __name__)
 
 
+def _hasher_busy():
+    response = jsonify({"error": "Server is busy, please retry shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @bp.route("/register", methods=["POST"])
 def register():
     """用户注册接口"""
@@ -24,7 +31,10 @@ def register():
 
     # 创建新用户
     new_user = User(username=username)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except PasswordHasherBusy:
+        return _hasher_busy()
     db.session.add(new_user)
     db.session.commit()
 
@@ -47,8 +57,20 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     # 验证用户和密码
-    if user is None or not user.check_password(password):
-        return jsonify({"error": "Invalid username or password"}), 401
+    try:
+        if user is None or not user.check_password(password):
+            return jsonify({"error": "Invalid username or password"}), 401
+    except PasswordHasherBusy:
+        return _hasher_busy()
+
+    # 代价因子配置变化后，趁用户登录时透明地重新哈希；
+    # 线程池繁忙时跳过，留到下次登录再做，不影响本次登录
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except PasswordHasherBusy:
+            pass
 
     # 生成 JWT Token
     token_payload = {
@@ -2,8 +2,9 @@
 
 from flask import Blueprint, request, jsonify
 from app.models import Category, Transaction
-from app import db
-from .decorators import token_required
+from app import db, category_cache, response_cache, rollups
+from app.serializers import CATEGORY
+from .decorators import token_required, read_only
 
 bp = Blueprint("categories", __name__)
 
@@ -11,13 +12,11 @@ bp = Blueprint("categories", __name__)
 # --- 获取分类列表 (逻辑微调，确保 user_id 正确) ---
 @bp.route("/categories", methods=["GET"])
 @token_required
+@response_cache.conditional("categories")
+@read_only
 def get_categories(current_user):
-    default_categories = Category.query.filter_by(is_custom=False).all()
-    user_categories = Category.query.filter_by(user_id=current_user.id).all()
-    categories_list = []
-    for c in default_categories + user_categories:
-        categories_list.append({"id": c.id, "name": c.name, "is_custom": c.is_custom})
-    return jsonify(categories_list)
+    categories = category_cache.categories_for_user(current_user.id)
+    return jsonify(CATEGORY.dump_objects(categories))
 
 
 # --- 创建分类 (逻辑微调，确保 user_id 正确) ---
@@ -31,6 +30,8 @@ def create_category(current_user):
     new_category = Category(name=data["name"], is_custom=True, user_id=current_user.id)
     db.session.add(new_category)
     db.session.commit()
+    category_cache.invalidate(current_user.id)
+    response_cache.bump_user_version(current_user.id)
     return jsonify(
         {
             "message": "Category created",
@@ -56,6 +57,8 @@ def update_category(current_user, id):
 
     category.name = data["name"]
     db.session.commit()
+    category_cache.invalidate(current_user.id)
+    response_cache.bump_user_version(current_user.id)
     return jsonify({"message": "Category updated successfully"})
 
 
@@ -69,8 +72,12 @@ def delete_category(current_user, id):
         return jsonify({"error": "Unauthorized to delete this category"}), 403
 
     # 在删除分类前，将使用该分类的交易记录的 category_id 设为 null
+    # 批量 UPDATE 不会触发 mapper 事件，需要手动把汇总数据并入"未分类"
     Transaction.query.filter_by(category_id=id).update({"category_id": None})
+    rollups.reassign_category(db.session.connection(), id, None)
 
     db.session.delete(category)
     db.session.commit()
+    category_cache.invalidate(current_user.id)
+    response_cache.bump_user_version(current_user.id)
     return jsonify({"message": "Category deleted successfully"})
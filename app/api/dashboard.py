@@ -1,19 +1,34 @@
-from flask import Blueprint, jsonify
-from app.models import Transaction, Category
-from app import db
-from .decorators import token_required
-from sqlalchemy import func
+from flask import Blueprint, request, jsonify
+from app.models import DailyRollup
+from app import db, category_cache, response_cache
+from .decorators import token_required, read_only
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from decimal import Decimal
+from app.money import format_cents
 
 bp = Blueprint("dashboard", __name__)
 
+# months 参数的取值范围；默认 2 个月正好覆盖"本月 + 上月对比"
+DEFAULT_HISTORY_MONTHS = 2
+MAX_HISTORY_MONTHS = 60
+
 
 @bp.route("/dashboard/summary", methods=["GET"])
 @token_required
+@response_cache.cached("dashboard")
+@read_only
 def get_dashboard_summary(current_user):
-    """获取仪表盘所需的全部汇总数据"""
+    """获取仪表盘所需的全部汇总数据
+
+    只对 daily_rollups 做一次范围查询，取出从窗口起点到本月底的
+    (日期, 类型, 分类) 汇总行，再在 Python 中折叠出各项指标。
+    可选参数 months=N 返回最近 N 个月(含本月)的逐月收支。
+    """
+    months = request.args.get("months", DEFAULT_HISTORY_MONTHS, type=int)
+    if not 1 <= months <= MAX_HISTORY_MONTHS:
+        return jsonify(
+            {"error": f"months must be between 1 and {MAX_HISTORY_MONTHS}"}
+        ), 400
 
     # --- 1. 日期计算 ---
     today = datetime.utcnow().date()
@@ -21,80 +36,88 @@ def get_dashboard_summary(current_user):
     start_of_next_month = start_of_current_month + relativedelta(months=1)
     start_of_last_month = start_of_current_month - relativedelta(months=1)
     thirty_days_ago = today - timedelta(days=29)
+    start_of_history = start_of_current_month - relativedelta(months=months - 1)
+    window_start = min(start_of_last_month, thirty_days_ago, start_of_history)
 
-    # --- 2. 当月收支与结余 (修正默认值为 Decimal) ---
-    current_month_income_query = db.session.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "income",
-        Transaction.transaction_date >= start_of_current_month,
-        Transaction.transaction_date < start_of_next_month,
-    ).scalar() or Decimal("0.0")
-
-    current_month_expense_query = db.session.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.transaction_date >= start_of_current_month,
-        Transaction.transaction_date < start_of_next_month,
-    ).scalar() or Decimal("0.0")
-
-    # --- 3. 与上月消费对比 (修正默认值为 Decimal) ---
-    last_month_expense_query = db.session.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == "expense",
-        Transaction.transaction_date >= start_of_last_month,
-        Transaction.transaction_date < start_of_current_month,
-    ).scalar() or Decimal("0.0")
-
-    # --- 4. 按消费类别统计 (饼图数据) ---
-    category_expense_query = (
-        db.session.query(Category.name, func.sum(Transaction.amount).label("total"))
-        .join(Category)
+    # --- 2. 单次查询预聚合的每日汇总 (行数只与天数有关，与交易笔数无关) ---
+    rows = (
+        db.session.query(
+            DailyRollup.date,
+            DailyRollup.type,
+            DailyRollup.category_id,
+            DailyRollup.total_cents,
+        )
         .filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.transaction_date >= start_of_current_month,
-            Transaction.transaction_date < start_of_next_month,
+            DailyRollup.user_id == current_user.id,
+            DailyRollup.date >= window_start,
+            DailyRollup.date < start_of_next_month,
         )
-        .group_by(Category.name)
-        .order_by(func.sum(Transaction.amount).desc())
         .all()
     )
 
-    # --- 5. 最近30天消费趋势 (折线图数据) ---
-    daily_trend_query = (
-        db.session.query(
-            func.date(Transaction.transaction_date).label("date"),
-            func.sum(Transaction.amount).label("total"),
+    # --- 3. 在内存中折叠出各项指标 (金额均为整数分) ---
+    monthly = {}  # 月初日期 -> {"income": 分, "expense": 分}
+    category_totals = {}
+    daily_trend = {}
+    category_names = category_cache.names_for_user(current_user.id)
+
+    for tx_date, tx_type, category_id, total in rows:
+        if tx_type not in ("income", "expense"):
+            continue
+        month_totals = monthly.setdefault(
+            tx_date.replace(day=1), {"income": 0, "expense": 0}
         )
-        .filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.transaction_date >= thirty_days_ago,
-            Transaction.transaction_date <= today,
+        month_totals[tx_type] += total
+
+        if tx_type != "expense":
+            continue
+        if tx_date >= start_of_current_month:
+            # 饼图只统计有分类的支出，同名分类合并
+            name = category_names.get(category_id)
+            if name is not None:
+                category_totals[name] = category_totals.get(name, 0) + total
+        if thirty_days_ago <= tx_date <= today:
+            daily_trend[tx_date] = daily_trend.get(tx_date, 0) + total
+
+    empty_month = {"income": 0, "expense": 0}
+    current_month = monthly.get(start_of_current_month, empty_month)
+    last_month = monthly.get(start_of_last_month, empty_month)
+
+    monthly_history = []
+    for i in range(months):
+        month = start_of_history + relativedelta(months=i)
+        totals = monthly.get(month, empty_month)
+        monthly_history.append(
+            {
+                "month": month.strftime("%Y-%m"),
+                "income": format_cents(totals["income"]),
+                "expense": format_cents(totals["expense"]),
+                "balance": format_cents(totals["income"] - totals["expense"]),
+            }
         )
-        .group_by(func.date(Transaction.transaction_date))
-        .order_by(func.date(Transaction.transaction_date))
-        .all()
-    )
 
-    # --- 6. 组装最终的 JSON 响应 ---
+    # --- 4. 组装最终的 JSON 响应 ---
     summary = {
         "current_month_summary": {
-            "income": f"{current_month_income_query:.2f}",
-            "expense": f"{current_month_expense_query:.2f}",
-            "balance": f"{(current_month_income_query - current_month_expense_query):.2f}",
+            "income": format_cents(current_month["income"]),
+            "expense": format_cents(current_month["expense"]),
+            "balance": format_cents(current_month["income"] - current_month["expense"]),
         },
         "last_month_comparison": {
-            "last_month_expense": f"{last_month_expense_query:.2f}",
-            "current_month_expense": f"{current_month_expense_query:.2f}",
+            "last_month_expense": format_cents(last_month["expense"]),
+            "current_month_expense": format_cents(current_month["expense"]),
         },
         "category_breakdown": [
-            {"category": name, "total": f"{total:.2f}"}
-            for name, total in category_expense_query
+            {"category": name, "total": format_cents(total)}
+            for name, total in sorted(
+                category_totals.items(), key=lambda item: item[1], reverse=True
+            )
         ],
         "daily_trend_last_30_days": [
-            {"date": date, "total": f"{total:.2f}"} for date, total in daily_trend_query
+            {"date": d.isoformat(), "total": format_cents(daily_trend[d])}
+            for d in sorted(daily_trend)
         ],
+        "monthly_history": monthly_history,
     }
 
     return jsonify(summary)
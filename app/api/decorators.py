@@ -1,11 +1,111 @@
 # app/api/decorators.py (修正后的版本)
 
 from functools import wraps
+import threading
+import time
+from collections import OrderedDict
 import jwt
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g
+from app import db, response_cache
+from app.db_routing import REPLICA_BIND
 from app.models import User
 
 
+class TokenPrincipal:
+    """根据 Token 声明构造的轻量用户对象。
+
+    大多数接口只用到 current_user.id，因此不再每次请求都查询 users 表；
+    第一次访问 id 以外的属性时才加载完整的 User 记录。
+    """
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        # 只有实例上找不到的属性才会走到这里
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __repr__(self):
+        return f"<TokenPrincipal {self.id}>"
+
+
+class TokenCache:
+    """已验证 Token 的有界 TTL 缓存: token -> (过期时间戳, user_id)"""
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def set(self, token, user_id, token_exp=None):
+        if self.ttl <= 0:
+            return
+        # 缓存条目不能比 Token 本身活得更久
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[token] = (expires_at, user_id)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _token_cache():
+    cache = current_app.extensions.get("token_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "token_cache",
+            TokenCache(
+                max_entries=current_app.config.get("TOKEN_CACHE_MAX_ENTRIES", 10000),
+                ttl=current_app.config.get("TOKEN_CACHE_TTL", 300),
+            ),
+        )
+    return cache
+
+
+def authenticate(token):
+    """校验 Token 并返回 TokenPrincipal；用户不存在时返回 None。
+
+    Token 校验失败时抛出 jwt 的异常。同一个 Token 在缓存有效期内再次出现时，
+    既不重新校验 HMAC 签名，也不查询数据库。
+    """
+    cache = _token_cache()
+    user_id = cache.get(token)
+    if user_id is not None:
+        return TokenPrincipal(user_id)
+
+    # 解码 Token，验证其有效性
+    data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    user_id = int(data["sub"])
+    # 只在缓存未命中时确认一次用户仍然存在
+    if db.session.query(User.id).filter_by(id=user_id).scalar() is None:
+        return None
+    cache.set(token, user_id, data.get("exp"))
+    return TokenPrincipal(user_id)
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -25,12 +125,7 @@ def token_required(f):
             return jsonify({"error": "Token is missing or header is malformed!"}), 401
 
         try:
-            # 解码 Token，验证其有效性
-            data = jwt.decode(
-                token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-            )
-            # 从 Token 中获取用户 ID，并查询数据库找到该用户
-            current_user = User.query.get(data["sub"])
+            current_user = authenticate(token)
             if not current_user:
                 return jsonify({"error": "User not found for this token!"}), 401
         except jwt.ExpiredSignatureError:
@@ -39,7 +134,24 @@ def token_required(f):
             # 我们不再需要那个 print 语句了，可以删掉
             return jsonify({"error": "Token is invalid!", "details": str(e)}), 401
 
-        # 将查询到的用户信息传递给被装饰的路由函数
+        # 将当前用户信息传递给被装饰的路由函数
+        return f(current_user, *args, **kwargs)
+
+    return decorated
+
+
+def read_only(f):
+    """标记只读接口：查询发往只读副本 (配置了 replica 时)，写操作仍走主库。
+
+    放在 token_required 之后使用；当前用户最近的写入还没有复制到副本时，
+    本次请求仍然读主库，保证写完之后立即读到新数据。
+    """
+
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        g.db_read_only = REPLICA_BIND in db.engines and (
+            response_cache.replica_is_current(current_user.id)
+        )
         return f(current_user, *args, **kwargs)
 
     return decorated
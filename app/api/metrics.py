@@ -0,0 +1,29 @@
+import hmac
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app import metrics
+
+bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus 文本格式的运行指标 (见 app/instrumentation.py)
+
+    不需要用户登录，但要求 Authorization: Bearer <METRICS_TOKEN>；
+    没有配置 METRICS_TOKEN 时接口关闭 (指标仍然照常采集)，避免默认对外暴露。
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if not metrics.enabled or not token:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({"error": "Invalid metrics token"}), 401
+    response = current_app.response_class(
+        metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
+    response.headers["Cache-Control"] = "no-store"
+    return response
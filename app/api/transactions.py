@@ -1,13 +1,22 @@
 # app/api/transactions.py (功能增强版)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.models import Transaction, Category, User
-from app import db
-from .decorators import token_required
+from app import db, category_cache, response_cache, importer, exporter, batch, search
+from app.serializers import TRANSACTION, TRANSACTION_ITEM
+from app.money import format_cents, to_cents
+from .decorators import token_required, read_only
+from sqlalchemy import func, tuple_
 from datetime import datetime
+import base64
+import io
+import json
 
 bp = Blueprint("transactions", __name__)
 
+# 列表按分类过滤时最多接受的分类数
+MAX_CATEGORY_FILTER = 50
+
 
 # --- 创建交易 (保持不变) ---
 @bp.route("/transactions", methods=["POST"])
@@ -40,42 +49,159 @@ def create_transaction(current_user):
 
         db.session.add(new_transaction)
         db.session.commit()
+        response_cache.bump_user_version(current_user.id)
         return jsonify(
             {"message": "Transaction created", "id": new_transaction.id}
         ), 201
+    except ValueError as e:
+        # 金额或日期格式不合法、金额超出范围
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "An error occurred", "details": str(e)}), 500
 
 
-# --- 获取交易列表 (保持不变) ---
+# 列表支持的排序键 -> (排序列, 是否降序)；排序列相同时按 id 同方向排序
+SORT_KEYS = {
+    "-date": (Transaction.transaction_date, True),
+    "date": (Transaction.transaction_date, False),
+    "-amount": (Transaction.amount_cents, True),
+    "amount": (Transaction.amount_cents, False),
+}
+
+
+def _encode_cursor(transaction, sort):
+    """把 (排序列的值, id, 排序键) 编码成不透明的游标字符串"""
+    column, _ = SORT_KEYS[sort]
+    value = getattr(transaction, column.key)
+    # 金额游标沿用 "12.30" 形式，与改为按分存储之前签发的游标兼容
+    value = value.isoformat() if sort.endswith("date") else format_cents(value)
+    raw = json.dumps([value, transaction.id, sort], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor, sort):
+    """解析游标，格式不正确或与当前排序键不符时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        # 早期的游标只有 [日期, id]，对应默认排序
+        value, last_id, cursor_sort = (values + ["-date"])[:3]
+        if cursor_sort != sort:
+            raise ValueError("Cursor does not match sort")
+        if sort.endswith("date"):
+            value = datetime.strptime(value, "%Y-%m-%d").date()
+        else:
+            # 超出金额范围的游标同样视为不合法，不能带到 SQL 参数里
+            value = to_cents(value)
+        return value, int(last_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _list_filters(user_id):
+    """把列表的查询参数编译成过滤条件，参数不合法时抛出 ValueError。
+
+    所有条件都以 user_id 开头，配合 Transaction 上的复合索引:
+    日期区间/类型 -> (user_id, transaction_date, id) 或 (user_id, type, transaction_date)，
+    分类 -> (user_id, category_id, transaction_date, id)，
+    金额区间 -> (user_id, amount_cents, id)。
+    """
+    filters = [Transaction.user_id == user_id]
+
+    try:
+        start = _parse_date_arg("start")
+        end = _parse_date_arg("end")
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD")
+    if start is not None:
+        filters.append(Transaction.transaction_date >= start)
+    if end is not None:
+        filters.append(Transaction.transaction_date <= end)
+
+    tx_type = request.args.get("type")
+    if tx_type:
+        if tx_type not in ("income", "expense"):
+            raise ValueError("type must be 'income' or 'expense'")
+        filters.append(Transaction.type == tx_type)
+
+    # category_id=1,2 或 category_id=1&category_id=2
+    category_ids = set()
+    for value in request.args.getlist("category_id"):
+        for part in value.split(","):
+            if part.strip():
+                try:
+                    category_ids.add(int(part))
+                except ValueError:
+                    raise ValueError("category_id must be a list of integers")
+    if len(category_ids) > MAX_CATEGORY_FILTER:
+        raise ValueError(f"At most {MAX_CATEGORY_FILTER} category_id values")
+    if category_ids:
+        filters.append(Transaction.category_id.in_(sorted(category_ids)))
+
+    min_amount = _parse_amount_arg("min_amount")
+    if min_amount is not None:
+        filters.append(Transaction.amount_cents >= min_amount)
+    max_amount = _parse_amount_arg("max_amount")
+    if max_amount is not None:
+        filters.append(Transaction.amount_cents <= max_amount)
+    return filters
+
+
+def _parse_amount_arg(name):
+    """解析金额参数，返回整数分；格式不合法或超出金额范围时抛出 ValueError"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return to_cents(value)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}")
+
+
+# --- 获取交易列表 ---
+# 默认使用 page/per_page 分页；传入 cursor 参数 (首页可为空字符串) 时切换为游标分页，
+# 按 (排序列, id) 做 seek 查询，不再 COUNT 和 OFFSET，翻到多深代价都一样。
+# 过滤参数: start, end (YYYY-MM-DD), type, category_id (可多个), min_amount, max_amount；
+# 排序参数 sort: -date (默认), date, -amount, amount。
 @bp.route("/transactions", methods=["GET"])
 @token_required
+@response_cache.conditional("transactions")
+@read_only
 def get_transactions(current_user):
-    page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
-    query = Transaction.query.filter_by(user_id=current_user.id).order_by(
-        Transaction.transaction_date.desc(), Transaction.id.desc()
+    sort = request.args.get("sort", "-date")
+    if sort not in SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(SORT_KEYS)}"}), 400
+    try:
+        filters = _list_filters(current_user.id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    column, descending = SORT_KEYS[sort]
+    if descending:
+        order_by = (column.desc(), Transaction.id.desc())
+    else:
+        order_by = (column.asc(), Transaction.id.asc())
+    # 只取序列化需要的列，不构造 ORM 对象
+    query = (
+        db.session.query(*TRANSACTION_ITEM.columns).filter(*filters).order_by(*order_by)
     )
+
+    if "cursor" in request.args:
+        return _get_transactions_by_cursor(current_user, query, per_page, sort, filters)
+
+    page = request.args.get("page", 1, type=int)
     paginated_transactions = query.paginate(
         page=page, per_page=per_page, error_out=False
     )
-    transactions_list = []
-    for t in paginated_transactions.items:
-        transactions_list.append(
-            {
-                "id": t.id,
-                "amount": str(t.amount),
-                "type": t.type,
-                "transaction_date": t.transaction_date.isoformat(),
-                "notes": t.notes,
-                "category_id": t.category_id,
-                "category_name": t.category.name if t.category else None,
-            }
-        )
+    category_names = category_cache.names_for_user(current_user.id)
     return jsonify(
         {
-            "items": transactions_list,
+            "items": TRANSACTION_ITEM.dump_all(
+                paginated_transactions.items, category_name=category_names
+            ),
             "total_items": paginated_transactions.total,
             "total_pages": paginated_transactions.pages,
             "current_page": paginated_transactions.page,
@@ -85,25 +211,182 @@ def get_transactions(current_user):
     )
 
 
-# --- 【新增】获取单条交易记录 ---
-@bp.route("/transactions/<int:id>", methods=["GET"])
+def _get_transactions_by_cursor(current_user, query, per_page, sort, filters):
+    if per_page < 1:
+        return jsonify({"error": "per_page must be positive"}), 400
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            last_value, last_id = _decode_cursor(cursor, sort)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        column, descending = SORT_KEYS[sort]
+        key = tuple_(column, Transaction.id)
+        last = tuple_(last_value, last_id)
+        query = query.filter(key < last if descending else key > last)
+
+    # 多取一条用来判断是否还有下一页
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    category_names = category_cache.names_for_user(current_user.id)
+    result = {
+        "items": TRANSACTION_ITEM.dump_all(rows, category_name=category_names),
+        "next_cursor": _encode_cursor(rows[-1], sort) if has_next else None,
+        "has_next": has_next,
+    }
+    # 总数需要 COUNT 全部匹配的记录，只有显式要求时才计算
+    if request.args.get("include_total", 0, type=int):
+        result["total_items"] = (
+            db.session.query(func.count(Transaction.id)).filter(*filters).scalar()
+        )
+    return jsonify(result)
+
+
+# --- 全文搜索交易备注 ---
+# ?q=牙医 复诊&limit=20&offset=0，每个词按前缀匹配，结果按相关度排序
+@bp.route("/transactions/search", methods=["GET"])
 @token_required
-def get_transaction(current_user, id):
-    transaction = Transaction.query.get_or_404(id)
-    if transaction.user_id != current_user.id:
-        return jsonify({"error": "Unauthorized"}), 403
+@response_cache.conditional("search")
+@read_only
+def search_transactions(current_user):
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    limit = request.args.get("limit", 20, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if not 1 <= limit <= 100 or offset < 0:
+        return jsonify({"error": "limit must be 1-100 and offset non-negative"}), 400
+
+    # 多取一条用来判断是否还有下一页
+    rows = search.search(current_user.id, q, limit=limit + 1, offset=offset)
+    category_names = category_cache.names_for_user(current_user.id)
     return jsonify(
         {
-            "id": transaction.id,
-            "amount": str(transaction.amount),
-            "type": transaction.type,
-            "transaction_date": transaction.transaction_date.isoformat(),
-            "notes": transaction.notes,
-            "category_id": transaction.category_id,
+            "items": TRANSACTION_ITEM.dump_objects(
+                rows[:limit], category_name=category_names
+            ),
+            "has_next": len(rows) > limit,
         }
     )
 
 
+# --- 批量导入交易 ---
+# 请求体为 CSV (Content-Type: text/csv，首行为表头) 或 NDJSON
+# (Content-Type: application/x-ndjson)，也可以用 ?format=csv|ndjson 指定。
+# 请求体按行流式解析，不会整体读入内存。
+@bp.route("/transactions/import", methods=["POST"])
+@token_required
+def import_transactions(current_user):
+    fmt = request.args.get("format")
+    if not fmt:
+        mimetype = request.mimetype
+        if mimetype == "text/csv":
+            fmt = "csv"
+        elif mimetype in ("application/x-ndjson", "application/jsonl"):
+            fmt = "ndjson"
+    if fmt not in importer.FORMATS:
+        return jsonify({"error": "Body must be CSV or NDJSON"}), 415
+
+    chunk_size = request.args.get("chunk_size", 1000, type=int)
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+    try:
+        summary = importer.import_transactions(
+            current_user.id,
+            importer.iter_rows(stream, fmt),
+            chunk_size=max(chunk_size, 1),
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    if summary["imported"]:
+        response_cache.bump_user_version(current_user.id)
+    return jsonify(summary)
+
+
+# --- 批量修改/删除交易 ---
+# 请求体: {"operations": [{"op": "update", "id": 1, "fields": {"category_id": 3}},
+#                         {"op": "delete", "id": 2}]}
+@bp.route("/transactions/batch", methods=["POST"])
+@token_required
+def batch_transactions(current_user):
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > batch.MAX_OPERATIONS:
+        return jsonify(
+            {"error": f"At most {batch.MAX_OPERATIONS} operations per request"}
+        ), 400
+
+    try:
+        summary = batch.apply_operations(current_user.id, operations)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    if summary["updated"] or summary["deleted"]:
+        response_cache.bump_user_version(current_user.id)
+    return jsonify(summary)
+
+
+# --- 流式导出交易 ---
+# ?format=csv|ndjson&start=YYYY-MM-DD&end=YYYY-MM-DD&gzip=1
+@bp.route("/transactions/export", methods=["GET"])
+@token_required
+@read_only
+def export_transactions(current_user):
+    fmt = request.args.get("format", "csv")
+    if fmt not in exporter.FORMATS:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    try:
+        start = _parse_date_arg("start")
+        end = _parse_date_arg("end")
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+
+    rows = exporter.iter_transactions(current_user.id, start=start, end=end)
+    chunks = exporter.iter_export(rows, fmt)
+    headers = {
+        "Content-Disposition": f"attachment; filename=transactions.{fmt}",
+    }
+    if request.args.get("gzip", 0, type=int):
+        chunks = exporter.iter_gzip(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# --- 【新增】获取单条交易记录 ---
+@bp.route("/transactions/<int:id>", methods=["GET"])
+@token_required
+@response_cache.conditional("transaction")
+@read_only
+def get_transaction(current_user, id):
+    row = (
+        db.session.query(Transaction.user_id, *TRANSACTION.columns)
+        .filter(Transaction.id == id)
+        .first_or_404()
+    )
+    if row.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(TRANSACTION.dump(row[1:]))
+
+
 # --- 【新增】更新一条交易记录 ---
 @bp.route("/transactions/<int:id>", methods=["PUT"])
 @token_required
@@ -113,7 +396,10 @@ def update_transaction(current_user, id):
         return jsonify({"error": "Unauthorized"}), 403
 
     data = request.get_json()
-    transaction.amount = data.get("amount", transaction.amount)
+    try:
+        transaction.amount = data.get("amount", transaction.amount)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     transaction.type = data.get("type", transaction.type)
     transaction.transaction_date = (
         datetime.strptime(data.get("transaction_date"), "%Y-%m-%d").date()
@@ -124,6 +410,7 @@ def update_transaction(current_user, id):
     transaction.category_id = data.get("category_id", transaction.category_id)
 
     db.session.commit()
+    response_cache.bump_user_version(current_user.id)
     return jsonify({"message": "Transaction updated successfully"})
 
 
@@ -137,4 +424,5 @@ def delete_transaction(current_user, id):
 
     db.session.delete(transaction)
     db.session.commit()
+    response_cache.bump_user_version(current_user.id)
     return jsonify({"message": "Transaction deleted successfully"})
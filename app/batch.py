@@ -0,0 +1,176 @@
+# app/batch.py
+"""批量修改/删除交易记录，供 POST /api/transactions/batch 使用。
+
+所有 id 的归属用一条 IN 查询校验；通过校验的操作合并成批量 DELETE，
+以及按修改内容分组的批量 UPDATE (例如 500 条改成同一分类只需一条语句)，
+全部在同一个事务中执行。单条操作不合法时只记录在结果里，不影响其他操作。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from app import db, category_cache, rollups
+from app.money import to_cents
+from app.models import Transaction
+
+OPS = ("update", "delete")
+UPDATABLE_FIELDS = ("amount", "type", "transaction_date", "notes", "category_id")
+# 单次请求最多包含的操作数
+MAX_OPERATIONS = 1000
+
+
+def _parse_changes(fields, allowed_category_ids):
+    """校验 update 操作的 fields，返回待写入的列值，不合法时抛出 ValueError"""
+    if not isinstance(fields, dict) or not fields:
+        raise ValueError("fields must be a non-empty object")
+    unknown = sorted(set(fields) - set(UPDATABLE_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    changes = {}
+    if "amount" in fields:
+        # 格式不合法和超出金额范围都只算这一条操作失败
+        try:
+            changes["amount_cents"] = to_cents(fields["amount"])
+        except ValueError as e:
+            raise ValueError(f"amount: {e}")
+    if "type" in fields:
+        if fields["type"] not in ("income", "expense"):
+            raise ValueError("type must be 'income' or 'expense'")
+        changes["type"] = fields["type"]
+    if "transaction_date" in fields:
+        try:
+            changes["transaction_date"] = datetime.strptime(
+                str(fields["transaction_date"]), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            raise ValueError("transaction_date must be YYYY-MM-DD")
+    if "notes" in fields:
+        notes = fields["notes"]
+        if notes is not None and not isinstance(notes, str):
+            raise ValueError("notes must be a string or null")
+        changes["notes"] = notes or None
+    if "category_id" in fields:
+        category_id = fields["category_id"]
+        if category_id is not None:
+            if not isinstance(category_id, int) or isinstance(category_id, bool):
+                raise ValueError("Invalid category_id")
+            if category_id not in allowed_category_ids:
+                raise ValueError("Category not found")
+        changes["category_id"] = category_id
+    return changes
+
+
+def _parse_operation(item, allowed_category_ids):
+    """返回 (op, id, changes)，不合法时抛出 ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError("Malformed operation")
+    op = item.get("op")
+    if op not in OPS:
+        raise ValueError("op must be 'update' or 'delete'")
+    tx_id = item.get("id")
+    if not isinstance(tx_id, int) or isinstance(tx_id, bool):
+        raise ValueError("id must be an integer")
+    changes = None
+    if op == "update":
+        changes = _parse_changes(item.get("fields"), allowed_category_ids)
+    return op, tx_id, changes
+
+
+def apply_operations(user_id, operations):
+    """执行一组操作，返回 {"updated", "deleted", "failed", "results"} 汇总。
+
+    results 与 operations 一一对应。调用方负责在返回后 commit (或出错时 rollback)。
+    """
+    allowed_category_ids = {c.id for c in category_cache.categories_for_user(user_id)}
+    results = [None] * len(operations)
+    parsed = []
+    seen_ids = set()
+
+    def fail(index, tx_id, error):
+        results[index] = {"id": tx_id, "status": "error", "error": error}
+
+    for index, item in enumerate(operations):
+        try:
+            op, tx_id, changes = _parse_operation(item, allowed_category_ids)
+        except ValueError as e:
+            tx_id = item.get("id") if isinstance(item, dict) else None
+            fail(index, tx_id, str(e))
+            continue
+        if tx_id in seen_ids:
+            fail(index, tx_id, "Duplicate id in batch")
+            continue
+        seen_ids.add(tx_id)
+        parsed.append((index, op, tx_id, changes))
+
+    # 一条 IN 查询取出所有记录的归属和汇总表需要的旧值
+    existing = {}
+    if seen_ids:
+        rows = db.session.execute(
+            select(
+                Transaction.id,
+                Transaction.user_id,
+                Transaction.amount_cents,
+                Transaction.type,
+                Transaction.transaction_date,
+                Transaction.category_id,
+            ).where(Transaction.id.in_(seen_ids))
+        )
+        existing = {row.id: row for row in rows}
+
+    deleted_ids = []
+    # 修改内容相同的记录合并成一条 UPDATE: ((列, 值), ...) -> [id, ...]
+    update_groups = {}
+    deltas = {}
+    for index, op, tx_id, changes in parsed:
+        row = existing.get(tx_id)
+        if row is None:
+            fail(index, tx_id, "Transaction not found")
+            continue
+        if row.user_id != user_id:
+            fail(index, tx_id, "Unauthorized")
+            continue
+
+        old_key = (user_id, row.transaction_date, row.type, row.category_id)
+        if op == "delete":
+            deleted_ids.append(tx_id)
+            rollups.add_delta(deltas, old_key, -row.amount_cents, -1)
+            results[index] = {"id": tx_id, "status": "deleted"}
+            continue
+
+        new_type = changes.get("type", row.type)
+        new_category_id = changes.get("category_id", row.category_id)
+        if new_type == "expense" and new_category_id is None:
+            fail(index, tx_id, "category_id is required for expense")
+            continue
+        new_key = (
+            user_id,
+            changes.get("transaction_date", row.transaction_date),
+            new_type,
+            new_category_id,
+        )
+        update_groups.setdefault(tuple(sorted(changes.items())), []).append(tx_id)
+        rollups.add_delta(deltas, old_key, -row.amount_cents, -1)
+        rollups.add_delta(
+            deltas, new_key, changes.get("amount_cents", row.amount_cents), 1
+        )
+        results[index] = {"id": tx_id, "status": "updated"}
+
+    # Core 层的批量语句不会触发 mapper 事件，汇总表的变化单独累计
+    table = Transaction.__table__
+    if deleted_ids:
+        db.session.execute(delete(table).where(table.c.id.in_(deleted_ids)))
+    for values, ids in update_groups.items():
+        db.session.execute(
+            update(table).where(table.c.id.in_(ids)).values(dict(values))
+        )
+    rollups.apply_deltas(db.session.connection(), deltas)
+
+    updated = sum(len(ids) for ids in update_groups.values())
+    return {
+        "updated": updated,
+        "deleted": len(deleted_ids),
+        "failed": len(operations) - updated - len(deleted_ids),
+        "results": results,
+    }
@@ -0,0 +1,105 @@
+# app/category_cache.py
+"""进程内的分类缓存。
+
+预设分类对所有用户共享，只缓存一份；自定义分类按 user_id 分开缓存。
+接口通过 (user_id, category_id) 查找分类名称，避免逐条访问 t.category 触发懒加载。
+分类的增删改以及 seed 命令负责调用 invalidate()；TTL 用来兜底多进程部署下
+其他 worker 写入造成的数据不一致。
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import or_
+
+CachedCategory = namedtuple("CachedCategory", ["id", "name", "is_custom", "user_id"])
+
+
+class CategoryCache:
+    def __init__(self, app=None):
+        self.ttl = 60
+        self._lock = threading.Lock()
+        self._defaults = None  # (过期时间, [CachedCategory, ...])
+        self._custom = {}  # user_id -> (过期时间, [CachedCategory, ...])
+        # 每次 invalidate 都会递增，加载期间发生失效时丢弃本次加载结果
+        self._generation = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("CATEGORY_CACHE_TTL", self.ttl)
+        self.invalidate()
+
+    def categories_for_user(self, user_id):
+        """返回该用户可用的全部分类：预设分类在前，自定义分类在后，各自按 id 排序"""
+        now = time.monotonic()
+        with self._lock:
+            defaults = self._fresh(self._defaults, now)
+            custom = self._fresh(self._custom.get(user_id), now)
+            generation = self._generation
+
+        if defaults is None or custom is None:
+            load_defaults = defaults is None
+            defaults, custom = self._load(user_id, defaults, custom)
+            expires_at = now + self.ttl
+            with self._lock:
+                if generation == self._generation:
+                    if load_defaults:
+                        self._defaults = (expires_at, defaults)
+                    self._custom[user_id] = (expires_at, custom)
+
+        return defaults + custom
+
+    def names_for_user(self, user_id):
+        """返回 {category_id: name}，只包含该用户可见的分类"""
+        return {c.id: c.name for c in self.categories_for_user(user_id)}
+
+    def get(self, user_id, category_id):
+        for c in self.categories_for_user(user_id):
+            if c.id == category_id:
+                return c
+        return None
+
+    def invalidate(self, user_id=None):
+        """清除缓存。传入 user_id 时只清除该用户的自定义分类，否则全部清除"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._defaults = None
+                self._custom.clear()
+            else:
+                self._custom.pop(user_id, None)
+
+    @staticmethod
+    def _fresh(entry, now):
+        if entry is None or entry[0] <= now:
+            return None
+        return entry[1]
+
+    @staticmethod
+    def _load(user_id, defaults, custom):
+        """用一条查询补齐缺失的部分"""
+        from app import db
+        from app.models import Category
+
+        conditions = []
+        if defaults is None:
+            conditions.append(Category.user_id.is_(None))
+        if custom is None:
+            conditions.append(Category.user_id == user_id)
+
+        rows = (
+            db.session.query(
+                Category.id, Category.name, Category.is_custom, Category.user_id
+            )
+            .filter(or_(*conditions))
+            .order_by(Category.id)
+            .all()
+        )
+        loaded = [CachedCategory(*row) for row in rows]
+        if defaults is None:
+            defaults = [c for c in loaded if c.user_id is None]
+        if custom is None:
+            custom = [c for c in loaded if c.user_id == user_id]
+        return defaults, custom
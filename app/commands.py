@@ -1,7 +1,12 @@
+import time
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
-from app import db
-from app.models import Category
+from app import db, category_cache, response_cache
+from app.models import Category, User
+from app import rollups, importer, db_tuning, datagen
+from app.db_routing import sync_sqlite_replica
 
 
 @click.command("seed")
@@ -23,4 +28,135 @@ def seed_command():
             print(f"Added default category: {cat_name}")
 
     db.session.commit()
+    category_cache.invalidate()
+    response_cache.bump_global_version()
     print("Default categories seeded.")
+
+
+@click.command("rebuild-rollups")
+@click.option("--user-id", type=int, default=None, help="只重建指定用户的汇总数据")
+@with_appcontext
+def rebuild_rollups_command(user_id):
+    """从 transactions 全量重建 daily_rollups 汇总表"""
+
+    count = rollups.rebuild(db.session.connection(), user_id=user_id)
+    db.session.commit()
+    # 仪表盘和分析接口的缓存都来自汇总表；全局版本号包含在所有缓存键和 ETag 中
+    if user_id is None:
+        response_cache.bump_global_version()
+    else:
+        response_cache.bump_user_version(user_id)
+    print(f"Rebuilt {count} daily rollup rows.")
+
+
+@click.command("import-transactions")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", required=True, help="导入到哪个用户名下")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(importer.FORMATS),
+    default=None,
+    help="文件格式，默认按扩展名判断 (.csv 或 .ndjson/.jsonl)",
+)
+@click.option("--chunk-size", type=int, default=5000, show_default=True)
+@with_appcontext
+def import_transactions_command(path, username, fmt, chunk_size):
+    """从 CSV 或 NDJSON 文件批量导入交易记录 (适合离线导入大量数据)"""
+
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"User not found: {username}")
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "ndjson"
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        summary = importer.import_transactions(
+            user.id, importer.iter_rows(f, fmt), chunk_size=chunk_size
+        )
+    db.session.commit()
+    response_cache.bump_user_version(user.id)
+
+    print(f"Imported {summary['imported']} transactions, {summary['failed']} failed.")
+    for error in summary["errors"]:
+        print(f"  row {error['row']}: {error['error']}")
+
+
+@click.command("gen-data")
+@click.option(
+    "--users",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="生成的用户数",
+)
+@click.option(
+    "--tx-per-user", type=int, default=1000, show_default=True, help="每个用户的交易数"
+)
+@click.option(
+    "--years", type=float, default=2, show_default=True, help="交易日期覆盖最近几年"
+)
+@click.option(
+    "--prefix", default="demo", show_default=True, help="用户名前缀 (demo1, demo2, ...)"
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="随机数种子")
+@click.option(
+    "--chunk-size", type=click.IntRange(min=1), default=20000, show_default=True
+)
+@with_appcontext
+def gen_data_command(users, tx_per_user, years, prefix, seed, chunk_size):
+    """批量生成压测用的模拟用户、自定义分类和交易记录 (密码均为 password)"""
+
+    start = time.perf_counter()
+    try:
+        counts = datagen.generate(
+            users,
+            tx_per_user,
+            years,
+            prefix=prefix,
+            seed=seed,
+            chunk_size=max(chunk_size, 1),
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    elapsed = time.perf_counter() - start
+    category_cache.invalidate()
+    response_cache.bump_global_version()
+    print(
+        f"Generated {counts['users']} users, {counts['categories']} custom categories "
+        f"and {counts['transactions']} transactions in {elapsed:.1f}s "
+        f"({counts['transactions'] / elapsed:,.0f} rows/s)."
+    )
+
+
+@click.command("db-tune")
+@with_appcontext
+def db_tune_command():
+    """打印数据库引擎实际生效的连接池参数和 PRAGMA 设置"""
+
+    for bind_key, engine in db.engines.items():
+        print(f"[{bind_key or 'default'}]")
+        for name, value in db_tuning.effective_settings(engine).items():
+            print(f"  {name} = {value}")
+
+
+@click.command("sync-replica")
+@click.option("--interval", type=float, default=None, help="每隔多少秒重复同步一次")
+@with_appcontext
+def sync_replica_command(interval):
+    """把 SQLite 主库复制到只读副本 (REPLICA_DATABASE_URL)"""
+
+    replica_url = current_app.config.get("REPLICA_DATABASE_URL")
+    if not replica_url:
+        raise click.ClickException("REPLICA_DATABASE_URL is not configured.")
+
+    primary_url = current_app.config["SQLALCHEMY_DATABASE_URI"]
+    while True:
+        # 记录开始复制的时间: 在此之前提交的写入都已包含在副本中
+        started_at = time.time_ns() // 1_000_000
+        pages = sync_sqlite_replica(primary_url, replica_url)
+        response_cache.mark_replica_synced(started_at)
+        print(f"Synced {pages} pages to replica.")
+        if interval is None:
+            break
+        time.sleep(interval)
@@ -0,0 +1,84 @@
+# app/compression.py
+"""按 Accept-Encoding 压缩响应体 (after_request)。
+
+只压缩体积超过 COMPRESS_MIN_SIZE 的 JSON/文本响应；流式响应 (SSE、导出)
+和已经设置了 Content-Encoding 的响应原样返回。安装了 brotli 包且客户端
+接受 br 时优先使用 brotli，否则使用 gzip。
+
+响应上的 ETag 都是弱校验值 (见 app/response_cache.py)，压缩前后语义相同，
+所以条件请求不受影响；强 ETag 在压缩时会被改为弱 ETag。
+"""
+
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+# 按前缀匹配；图片、已压缩的文件等其他类型不再压缩
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+class Compression:
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+        self.gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", 6)
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", 4)
+        if app.config.get("COMPRESS_ENABLED", True):
+            app.after_request(self.after_request)
+
+    def encodings(self):
+        """服务端支持的编码，按优先顺序"""
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def after_request(self, response):
+        if not response.mimetype.startswith(COMPRESSIBLE_MIMETYPES):
+            return response
+        if response.is_streamed or response.direct_passthrough:
+            return response
+        if "Content-Encoding" in response.headers:
+            return response
+        if "no-transform" in response.headers.get("Cache-Control", ""):
+            return response
+        # 同一 URL 的响应随 Accept-Encoding 不同而不同，供中间缓存区分
+        response.vary.add("Accept-Encoding")
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        if request.method == "HEAD":
+            return response
+
+        encoding = request.accept_encodings.best_match(self.encodings())
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        compressed = self.compress(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
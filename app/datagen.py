@@ -0,0 +1,276 @@
+# app/datagen.py
+"""生成用于压测的模拟数据，供 `flask gen-data` 使用。
+
+每个用户生成若干自定义分类，以及 years 年内的交易记录:
+- 收入: 每月固定发薪日的工资 (逐年小幅上涨)，外加少量零星收入；
+- 支出: 按分类的权重抽取分类，金额服从各分类的对数正态分布，
+  周末的消费笔数更多；约六成记录带有商户名备注。
+
+随机数用 NumPy 按日期分块成批生成 (每块最多 chunk_size 条)，每块用 Core 层的
+executemany 插入，不构造 ORM 对象；mapper 事件因此不会触发，最后用
+rollups.rebuild() 一次性重建汇总表。全文索引同样在插入结束后一次性写入 (见 search.bulk_load)。
+"""
+
+from datetime import date, timedelta
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy import insert, select
+
+from app import db, password_hasher, rollups, search
+from app.models import Category, Transaction, User
+
+# 预设分类 -> (抽取权重, 金额中位数/元, 对数标准差)；未列出的分类使用 DEFAULT_PROFILE
+CATEGORY_PROFILES = {
+    "餐饮": (0.35, 35, 0.6),
+    "交通": (0.15, 15, 0.7),
+    "购物": (0.12, 150, 1.0),
+    "日用": (0.10, 50, 0.8),
+    "娱乐": (0.07, 100, 0.9),
+    "学习": (0.04, 200, 1.0),
+    "其他": (0.05, 80, 1.0),
+}
+DEFAULT_PROFILE = (0.05, 80, 1.0)
+CUSTOM_PROFILE = (0.04, 120, 1.0)
+CUSTOM_CATEGORIES = ["宠物", "健身", "旅行", "育儿", "医疗", "礼物", "订阅", "房租"]
+MAX_CUSTOM_CATEGORIES = 3
+
+MERCHANTS = {
+    "餐饮": ["星巴克", "麦当劳", "肯德基", "食堂", "外卖", "火锅", "面馆", "瑞幸咖啡"],
+    "交通": ["地铁", "公交", "打车", "滴滴", "加油", "停车费", "高铁"],
+    "购物": ["京东", "淘宝", "拼多多", "优衣库", "宜家", "数码城"],
+    "日用": ["超市", "便利店", "盒马", "物业费", "水电费", "话费"],
+    "娱乐": ["电影", "KTV", "演唱会", "游戏充值", "桌游"],
+    "学习": ["书店", "网课", "考试报名", "文具"],
+}
+GENERIC_NOTES = [
+    "午饭",
+    "晚饭",
+    "早餐",
+    "周末",
+    "朋友聚会",
+    "报销",
+    "网购",
+    "coffee",
+    "lunch",
+]
+NOTES_RATIO = 0.6
+# 零星收入占收入笔数的比例
+SIDE_INCOME_RATIO = 0.2
+DEFAULT_PASSWORD = "password"
+
+
+def _profile(category):
+    if category.is_custom:
+        return CUSTOM_PROFILE
+    return CATEGORY_PROFILES.get(category.name, DEFAULT_PROFILE)
+
+
+def _notes_pool(category):
+    return MERCHANTS.get(category.name, []) + GENERIC_NOTES
+
+
+def _paydays(start, end, payday):
+    """区间内每个月的发薪日"""
+    paydays = []
+    month = start.replace(day=1)
+    while month <= end:
+        if start <= month.replace(day=payday) <= end:
+            paydays.append(month.replace(day=payday))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return paydays
+
+
+def user_transactions(rng, user_id, categories, tx_count, start, days, chunk_size):
+    """按日期顺序逐块生成一个用户的交易记录，每块最多 chunk_size 条。
+
+    先按天数抽好每天的笔数，再按日期区间分块生成金额、分类和备注，
+    内存中同时只有一块的 dict，单个用户的交易数很大时也不会占满内存。
+    产出可直接用于 insert 的 dict 列表。
+    """
+    end = start + timedelta(days=days - 1)
+    paydays = _paydays(start, end, int(rng.integers(1, 29)))
+    income_count = min(tx_count // 5, int(len(paydays) * (1 + SIDE_INCOME_RATIO)))
+    salary_count = min(income_count, len(paydays))
+    expense_count = tx_count - income_count
+
+    # 工资: 每月发薪日 (每满一年涨 5%)，按日期编号以便与其他记录一起分块
+    salary = float(rng.lognormal(np.log(12000), 0.4))
+    salary_by_day = {
+        (payday_date - start).days: int(salary * 1.05 ** (m // 12) * 100)
+        for m, payday_date in enumerate(paydays[:salary_count])
+    }
+    # 零星收入和支出只先确定每天的笔数，具体内容在生成对应的块时再抽取
+    side_per_day = np.bincount(
+        rng.integers(0, days, income_count - salary_count), minlength=days
+    )
+    # 周末 (周六、周日) 的消费笔数是工作日的 1.5 倍
+    weekdays = (np.arange(days) + start.weekday()) % 7
+    day_weights = np.where(weekdays >= 5, 1.5, 1.0)
+    expense_per_day = rng.multinomial(expense_count, day_weights / day_weights.sum())
+
+    profiles = [_profile(c) for c in categories]
+    weights = np.array([p[0] for p in profiles])
+    weights = weights / weights.sum()
+    medians = np.array([p[1] for p in profiles])
+    sigmas = np.array([p[2] for p in profiles])
+    pools = [_notes_pool(c) for c in categories]
+    category_ids = [c.id for c in categories]
+
+    per_day = expense_per_day + side_per_day
+    for day in salary_by_day:
+        per_day[day] += 1
+    # 按累计笔数把日期切成若干段，每段不超过 chunk_size 条 (单日超出时单独成段)
+    cumulative = np.cumsum(per_day)
+    first_day = 0
+    while first_day < days:
+        base = cumulative[first_day - 1] if first_day else 0
+        last_day = int(np.searchsorted(cumulative, base + chunk_size, side="right"))
+        last_day = min(max(last_day, first_day + 1), days)
+        yield _day_range_rows(
+            rng,
+            user_id,
+            start,
+            range(first_day, last_day),
+            salary_by_day,
+            side_per_day[first_day:last_day],
+            expense_per_day[first_day:last_day],
+            (weights, medians, sigmas, pools, category_ids),
+        )
+        first_day = last_day
+
+
+def _day_range_rows(
+    rng, user_id, start, day_range, salary_by_day, side_counts, expense_counts, model
+):
+    weights, medians, sigmas, pools, category_ids = model
+    rows = []
+    side_days = np.repeat(np.arange(day_range.start, day_range.stop), side_counts)
+    side_amounts = np.rint(rng.lognormal(np.log(500), 0.8, len(side_days)) * 100)
+    expense_days = np.repeat(np.arange(day_range.start, day_range.stop), expense_counts)
+    count = len(expense_days)
+    picks = rng.choice(len(category_ids), size=count, p=weights)
+    cents = np.maximum(
+        1, np.rint(rng.lognormal(np.log(medians[picks]), sigmas[picks]) * 100)
+    )
+    has_note = rng.random(count) < NOTES_RATIO
+    note_index = rng.integers(0, 1 << 30, count)
+
+    for day in day_range:
+        if day in salary_by_day:
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "amount_cents": salary_by_day[day],
+                    "type": "income",
+                    "transaction_date": start + timedelta(days=day),
+                    "notes": "工资",
+                    "category_id": None,
+                }
+            )
+    for day, amount in zip(side_days.tolist(), side_amounts.tolist()):
+        rows.append(
+            {
+                "user_id": user_id,
+                "amount_cents": int(amount),
+                "type": "income",
+                "transaction_date": start + timedelta(days=day),
+                "notes": "兼职",
+                "category_id": None,
+            }
+        )
+    for pick, day, amount, noted, n in zip(
+        picks.tolist(),
+        expense_days.tolist(),
+        cents.tolist(),
+        has_note.tolist(),
+        note_index.tolist(),
+    ):
+        pool = pools[pick]
+        rows.append(
+            {
+                "user_id": user_id,
+                "amount_cents": int(amount),
+                "type": "expense",
+                "transaction_date": start + timedelta(days=day),
+                "notes": pool[n % len(pool)] if noted else None,
+                "category_id": category_ids[pick],
+            }
+        )
+    # 块内按日期排序；块之间本来就是按日期先后产出的，
+    # (user_id, transaction_date, ...) 等索引基本是顺序追加
+    rows.sort(key=itemgetter("transaction_date"))
+    return rows
+
+
+def create_users(count, prefix):
+    """批量创建用户 (共用同一个密码哈希)，返回 [(id, username)]"""
+    usernames = [f"{prefix}{i}" for i in range(1, count + 1)]
+    if not usernames:
+        # executemany 传入空列表时会插入一行全是默认值的记录
+        return []
+    wanted = set(usernames)
+    existing = db.session.execute(
+        select(User.username).where(User.username.like(f"{prefix}%"))
+    ).scalars()
+    taken = sorted(wanted.intersection(existing))
+    if taken:
+        raise ValueError(f"User {taken[0]} already exists; use another prefix")
+    # bcrypt 很慢，所有模拟用户共用一个哈希，密码均为 DEFAULT_PASSWORD
+    password_hash = password_hasher.hash(DEFAULT_PASSWORD)
+    db.session.execute(
+        insert(User.__table__),
+        [{"username": name, "password_hash": password_hash} for name in usernames],
+    )
+    rows = db.session.execute(
+        select(User.id, User.username).where(User.username.like(f"{prefix}%"))
+    ).all()
+    return sorted((row.id, row.username) for row in rows if row.username in wanted)
+
+
+def generate(users, tx_per_user, years, prefix="demo", seed=0, chunk_size=20000):
+    """生成模拟数据并提交，返回插入的 {"users", "categories", "transactions"} 数量。
+
+    每个用户的交易按日期分块生成，每块 (最多 chunk_size 条) 执行一次 executemany；
+    调用前需要已有预设分类。
+    """
+    presets = Category.query.filter_by(is_custom=False).all()
+    if not presets:
+        raise ValueError("No default categories; run `flask seed` first")
+
+    rng = np.random.default_rng(seed)
+    end = date.today()
+    days = max(1, int(years * 365))
+    start = end - timedelta(days=days - 1)
+
+    user_rows = create_users(users, prefix)
+    custom_rows = []
+    for user_id, _ in user_rows:
+        count = int(rng.integers(0, MAX_CUSTOM_CATEGORIES + 1))
+        for name in rng.choice(CUSTOM_CATEGORIES, size=count, replace=False).tolist():
+            custom_rows.append({"name": name, "is_custom": True, "user_id": user_id})
+    if custom_rows:
+        db.session.execute(insert(Category.__table__), custom_rows)
+    customs = {}
+    for category in Category.query.filter(Category.is_custom.is_(True)).all():
+        customs.setdefault(category.user_id, []).append(category)
+
+    table = Transaction.__table__
+    inserted = 0
+    with search.bulk_load():
+        for user_id, _ in user_rows:
+            categories = presets + customs.get(user_id, [])
+            for rows in user_transactions(
+                rng, user_id, categories, tx_per_user, start, days, chunk_size
+            ):
+                if rows:
+                    db.session.execute(insert(table), rows)
+                    inserted += len(rows)
+
+    rollups.rebuild(db.session.connection())
+    db.session.commit()
+    return {
+        "users": len(user_rows),
+        "categories": len(custom_rows),
+        "transactions": inserted,
+    }
@@ -0,0 +1,60 @@
+# app/db_routing.py
+"""读写分离的会话路由。
+
+配置了 REPLICA_DATABASE_URL 时，SQLALCHEMY_BINDS 中会多出一个 "replica" 引擎。
+被 @read_only 标记的接口里，查询语句发往只读副本；以下情况仍然使用主库:
+- 未标记的接口、CLI 命令和后台任务；
+- INSERT/UPDATE/DELETE 等写语句以及 flush；
+- 同一个请求中已经写过主库之后的所有查询 (保证读到自己刚写的数据)；
+- 当前用户最近一次写入发生在副本最近一次同步开始之后 (写入和同步的时间
+  记录在响应缓存的后端里，见 ResponseCache.replica_is_current)。
+
+SQLite 没有内置复制，`flask sync-replica` 用 SQLite 的在线备份接口
+把主库整体复制到副本文件，可以用 --interval 定期执行。同步时间要被 web
+进程看到，需要使用 RESPONSE_CACHE_BACKEND=sqlite；memory 后端下用户写过
+数据之后，该进程会一直为这个用户读主库。
+"""
+
+import sqlite3
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not has_app_context() or not g.get("db_read_only"):
+            return False
+        if self._flushing or isinstance(clause, UpdateBase):
+            # 写操作之后，本次请求剩余的查询都留在主库
+            self.info["wrote"] = True
+            return False
+        # 不带语句直接取连接 (session.connection()) 的通常是为了写
+        if clause is None:
+            return False
+        return not self.info.get("wrote")
+
+
+def sync_sqlite_replica(primary_url, replica_url):
+    """把 SQLite 主库在线复制到副本文件，返回复制的页数"""
+    primary_path = make_url(primary_url).database
+    replica_path = make_url(replica_url).database
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(target)
+        return source.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
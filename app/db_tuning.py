@@ -0,0 +1,115 @@
+# app/db_tuning.py
+"""数据库引擎的生产环境配置 (DB_ENGINE_PROFILE = "production")。
+
+SQLite 默认的回滚日志模式下，写事务会阻塞所有读，多个 gunicorn worker
+同时写入时很容易出现 "database is locked"。这里在每个新连接上设置:
+- journal_mode=WAL: 读写互不阻塞，提交只需追加 WAL 文件；
+- synchronous=NORMAL: WAL 模式下仍能保证一致性，提交时少一次 fsync；
+- busy_timeout: 遇到写锁时等待而不是立即报错；
+- mmap_size / cache_size / temp_store: 减少读取时的系统调用和临时文件。
+
+连接池参数按数据库类型区分：SQLite 文件库只需限制连接数；
+MySQL/PostgreSQL 等服务端数据库还需要定期回收连接并在取用前探活。
+`flask db-tune` 打印每个引擎实际生效的设置。
+"""
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+# PRAGMA 查询返回的是数字，打印时换成可读的名称
+_PRAGMA_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+
+def _is_memory_sqlite(url):
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def engine_options(config):
+    """根据数据库地址生成 SQLALCHEMY_ENGINE_OPTIONS"""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        # 内存数据库使用 SQLAlchemy 默认的单连接池，不能调整大小
+        if _is_memory_sqlite(url):
+            return {}
+        return {
+            "pool_size": config.get("DB_POOL_SIZE", 5),
+            "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+            "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        }
+    return {
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        # 服务端会主动断开长时间空闲的连接
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas(config, memory=False):
+    """按执行顺序返回 (pragma, 值) 列表"""
+    pragmas = []
+    if not memory:
+        # 内存数据库没有日志文件，也不能做内存映射
+        pragmas.append(("journal_mode", config.get("SQLITE_JOURNAL_MODE", "WAL")))
+        pragmas.append(("mmap_size", config.get("SQLITE_MMAP_SIZE", 268435456)))
+    pragmas += [
+        ("synchronous", config.get("SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT", 5000)),
+        ("cache_size", config.get("SQLITE_CACHE_SIZE", -64000)),
+        ("temp_store", config.get("SQLITE_TEMP_STORE", "MEMORY")),
+    ]
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, config):
+    """在引擎的每个新连接上执行 PRAGMA；非 SQLite 引擎直接忽略"""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(config, memory=_is_memory_sqlite(engine.url))
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def effective_settings(engine):
+    """读取引擎当前生效的连接池参数和 PRAGMA 值"""
+    pool = engine.pool
+    settings = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": type(pool).__name__,
+    }
+    for attr in ("size", "timeout"):
+        method = getattr(pool, attr, None)
+        if callable(method):
+            settings[f"pool_{attr}"] = method()
+    if hasattr(pool, "_max_overflow"):
+        settings["pool_max_overflow"] = pool._max_overflow
+    settings["pool_recycle"] = pool._recycle
+    settings["pool_pre_ping"] = pool._pre_ping
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            settings["sqlite_version"] = conn.execute(
+                text("SELECT sqlite_version()")
+            ).scalar()
+            for name in (
+                "journal_mode",
+                "synchronous",
+                "busy_timeout",
+                "mmap_size",
+                "cache_size",
+                "temp_store",
+            ):
+                value = conn.execute(text(f"PRAGMA {name}")).scalar()
+                settings[name] = _PRAGMA_NAMES.get(name, {}).get(value, value)
+    return settings
@@ -0,0 +1,86 @@
+# app/exporter.py
+"""流式导出用户的全部交易记录，供 GET /api/transactions/export 使用。
+
+查询通过 yield_per 分批从数据库游标中取数，序列化后的数据按块产出，
+可选地逐块 gzip 压缩；无论历史记录有多少，内存占用都保持恒定。
+"""
+
+import csv
+import io
+import zlib
+
+from sqlalchemy import select
+
+from app import db
+from app.json_provider import dumps_line
+from app.models import Category, Transaction
+from app.serializers import TRANSACTION_EXPORT
+
+FORMATS = ("csv", "ndjson")
+COLUMNS = [name for name, _, _ in TRANSACTION_EXPORT.fields]
+# 每累计这么多行向客户端输出一次
+ROWS_PER_CHUNK = 500
+
+
+def iter_transactions(user_id, start=None, end=None, batch_size=1000):
+    """按日期升序逐条产出序列化后的交易记录 (dict，附带分类名称)"""
+    stmt = (
+        select(*TRANSACTION_EXPORT.columns)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.transaction_date, Transaction.id)
+    )
+    if start is not None:
+        stmt = stmt.where(Transaction.transaction_date >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.transaction_date <= end)
+
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        # 每批 batch_size 行一起序列化
+        for rows in result.partitions():
+            yield from TRANSACTION_EXPORT.dump_all(rows)
+    finally:
+        result.close()
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for i, item in enumerate(rows, start=1):
+        writer.writerow(item.values())
+        if i % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows):
+    lines = []
+    for item in rows:
+        lines.append(dumps_line(item))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_export(rows, fmt):
+    if fmt == "csv":
+        return iter_csv(rows)
+    if fmt == "ndjson":
+        return iter_ndjson(rows)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def iter_gzip(chunks):
+    """把文本块逐块压缩成 gzip 流"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 输出 gzip 格式
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
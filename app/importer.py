@@ -0,0 +1,162 @@
+# app/importer.py
+"""批量导入交易记录，供 POST /api/transactions/import 和
+`flask import-transactions` 命令共用。
+
+输入按行流式解析 (CSV 或 NDJSON)，逐行校验后按 chunk_size 分批用
+executemany 插入，全部批次在同一个事务中提交。单行出错只记录错误，
+不会中断整个导入。
+"""
+
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import db, category_cache, rollups
+from app.money import to_cents
+from app.models import Transaction
+
+FIELDS = ["amount", "type", "transaction_date", "category_id", "notes"]
+FORMATS = ("csv", "ndjson")
+# 响应中最多返回这么多条错误明细，其余只计数
+MAX_REPORTED_ERRORS = 100
+
+
+def iter_csv_rows(stream):
+    """逐行读取 CSV，首行为表头；产出 (行号, dict)"""
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, row
+
+
+def iter_ndjson_rows(stream):
+    """逐行读取 NDJSON；产出 (行号, dict)，空行跳过"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row
+
+
+def iter_rows(stream, fmt):
+    if fmt == "csv":
+        return iter_csv_rows(stream)
+    if fmt == "ndjson":
+        return iter_ndjson_rows(stream)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _parse_category_id(value):
+    """CSV 中是字符串，NDJSON 中可能是数字；只接受整数值 (1.9 不会被截断成 1)"""
+    if isinstance(value, bool):
+        raise ValueError("Invalid category_id")
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError("Invalid category_id")
+
+
+def _parse_row(row, user_id, allowed_category_ids):
+    """把一行原始数据转换成待插入的参数字典，数据不合法时抛出 ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError("Malformed row")
+
+    # NDJSON 中的数字 0 也是有效金额，只把缺失和空字符串当作缺少字段
+    missing = [
+        f for f in ("amount", "type", "transaction_date") if row.get(f) in (None, "")
+    ]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    tx_type = row["type"]
+    if tx_type not in ("income", "expense"):
+        raise ValueError("type must be 'income' or 'expense'")
+
+    amount_cents = to_cents(row["amount"])
+
+    try:
+        tx_date = datetime.strptime(str(row["transaction_date"]), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("transaction_date must be YYYY-MM-DD")
+
+    category_id = row.get("category_id")
+    if category_id in ("", None):
+        category_id = None
+    else:
+        category_id = _parse_category_id(category_id)
+        if category_id not in allowed_category_ids:
+            raise ValueError("Category not found")
+    if tx_type == "expense" and category_id is None:
+        raise ValueError("category_id is required for expense")
+
+    notes = row.get("notes")
+    if notes is not None and not isinstance(notes, str):
+        raise ValueError("notes must be a string")
+
+    return {
+        "user_id": user_id,
+        "amount_cents": amount_cents,
+        "type": tx_type,
+        "transaction_date": tx_date,
+        "notes": notes or None,
+        "category_id": category_id,
+    }
+
+
+def import_transactions(user_id, rows, chunk_size=1000):
+    """导入 (行号, dict) 序列，返回 {"imported", "failed", "errors"} 汇总。
+
+    调用方负责在返回后 commit (或出错时 rollback)。
+    """
+    # 用户可用的分类一次性取出 (命中分类缓存时不查询数据库)
+    allowed_category_ids = {c.id for c in category_cache.categories_for_user(user_id)}
+    table = Transaction.__table__
+    deltas = {}
+    batch = []
+    imported = 0
+    failed = 0
+    errors = []
+
+    def flush():
+        # Core 层的 executemany 不会触发 mapper 事件，汇总表的变化单独累计
+        db.session.execute(insert(table), batch)
+        for values in batch:
+            rollups.add_delta(
+                deltas,
+                (
+                    values["user_id"],
+                    values["transaction_date"],
+                    values["type"],
+                    values["category_id"],
+                ),
+                values["amount_cents"],
+                1,
+            )
+        batch.clear()
+
+    for line_no, row in rows:
+        try:
+            batch.append(_parse_row(row, user_id, allowed_category_ids))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": line_no, "error": str(e)})
+            continue
+        imported += 1
+        if len(batch) >= chunk_size:
+            flush()
+
+    if batch:
+        flush()
+    rollups.apply_deltas(db.session.connection(), deltas)
+    return {"imported": imported, "failed": failed, "errors": errors}
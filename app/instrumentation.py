@@ -0,0 +1,313 @@
+# app/instrumentation.py
+"""请求与 SQL 的运行指标，由 GET /api/metrics 以 Prometheus 文本格式输出。
+
+- before_request / after_request 记录每个路由 (按 endpoint 名称区分) 的延迟直方图；
+  流式响应 (SSE、导出) 只计到响应头返回为止；
+- 在所有引擎上监听 before/after_cursor_execute，统计每个请求执行的 SQL 条数和
+  数据库耗时；请求之外 (后台任务、命令行) 的语句只计入总数；
+- 大模型调用的次数、错误、重试和耗时来自 llm_client，另外记录单次调用的延迟直方图。
+
+设置 METRICS_SLOW_REQUEST_MS 后，超过该耗时的请求会记一条慢请求日志，
+列出执行过的语句；同一条语句在一个请求里执行次数达到
+METRICS_N_PLUS_ONE_THRESHOLD 次时标记为疑似 N+1 查询。
+
+指标保存在进程内存中，多 worker 部署时每个进程分别统计。
+"""
+
+import bisect
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# 请求延迟与数据库耗时的分桶 (秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# 大模型调用通常要几秒到几十秒
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+# 每个请求的 SQL 条数
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# 慢请求日志中最多列出这么多条语句
+SLOW_LOG_MAX_STATEMENTS = 20
+
+
+class Histogram:
+    """按标签分组的累积直方图 (线程安全)"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # 标签值 -> [各桶计数..., 总数, 总和]
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = {labels: list(s) for labels, s in self._series.items()}
+        for labels in sorted(snapshot):
+            series = snapshot[labels]
+            label_text = _labels(self.label_names, labels)
+            prefix = label_text[:-1] + "," if label_text else "{"
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{prefix}le="{bound}"}} {cumulative}')
+            total = cumulative + series[-2]
+            lines.append(f'{self.name}_bucket{prefix}le="+Inf"}} {total}')
+            lines.append(f"{self.name}_sum{label_text} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{label_text} {total}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _sample(name, help_text, kind, value):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+class RequestStats:
+    """一个请求内累计的 SQL 统计，保存在 g 上"""
+
+    __slots__ = ("start", "statements", "db_seconds", "log")
+
+    def __init__(self, capture):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        # 开启慢请求日志时记录每条语句: [(语句, 耗时)]
+        self.log = [] if capture else None
+
+
+class Instrumentation:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_request_seconds = None
+        self.n_plus_one_threshold = 5
+        self.request_latency = Histogram(
+            "http_request_duration_seconds",
+            "Time spent handling a request, by route.",
+            ("method", "endpoint", "status"),
+            LATENCY_BUCKETS,
+        )
+        self.request_statements = Histogram(
+            "http_request_sql_statements",
+            "SQL statements executed per request.",
+            ("endpoint",),
+            STATEMENT_BUCKETS,
+        )
+        self.request_db_time = Histogram(
+            "http_request_db_seconds",
+            "Time spent in the database per request.",
+            ("endpoint",),
+            LATENCY_BUCKETS,
+        )
+        self.llm_latency = Histogram(
+            "llm_request_duration_seconds",
+            "Duration of calls to the advice LLM, including retries.",
+            (),
+            LLM_BUCKETS,
+        )
+        self._lock = threading.Lock()
+        self._totals = {"sql_statements": 0, "sql_seconds": 0.0, "slow_requests": 0}
+        self._logger = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """需要在 db.init_app 之后调用"""
+        from app import db, llm_client
+
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        slow_ms = app.config.get("METRICS_SLOW_REQUEST_MS", 0)
+        self.slow_request_seconds = slow_ms / 1000 if slow_ms else None
+        self.n_plus_one_threshold = app.config.get("METRICS_N_PLUS_ONE_THRESHOLD", 5)
+        self._logger = app.logger
+        self.reset()
+        if not self.enabled:
+            return
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(
+                    engine, "before_cursor_execute", self._before_cursor_execute
+                ):
+                    event.listen(
+                        engine, "before_cursor_execute", self._before_cursor_execute
+                    )
+                    event.listen(
+                        engine, "after_cursor_execute", self._after_cursor_execute
+                    )
+        llm_client.add_observer(self._observe_llm)
+
+    def reset(self):
+        for histogram in self._histograms():
+            histogram.reset()
+        with self._lock:
+            self._totals = dict.fromkeys(self._totals, 0)
+            self._totals["sql_seconds"] = 0.0
+
+    def _histograms(self):
+        return (
+            self.request_latency,
+            self.request_statements,
+            self.request_db_time,
+            self.llm_latency,
+        )
+
+    # --- 请求钩子 ---
+    def before_request(self):
+        g.request_stats = RequestStats(capture=self.slow_request_seconds is not None)
+
+    def after_request(self, response):
+        stats = g.pop("request_stats", None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.start
+        # 未匹配到路由的请求 (404 等) 归为一类，避免 URL 作为标签导致序列数失控
+        endpoint = request.endpoint or "unmatched"
+        self.request_latency.observe(
+            (request.method, endpoint, str(response.status_code)), elapsed
+        )
+        self.request_statements.observe((endpoint,), stats.statements)
+        self.request_db_time.observe((endpoint,), stats.db_seconds)
+        slow = self.slow_request_seconds
+        if slow is not None and elapsed >= slow:
+            self._log_slow_request(endpoint, response.status_code, elapsed, stats)
+        return response
+
+    # --- SQL 事件 ---
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        with self._lock:
+            self._totals["sql_statements"] += 1
+            self._totals["sql_seconds"] += elapsed
+        if not has_request_context():
+            return
+        stats = g.get("request_stats")
+        if stats is None:
+            return
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if stats.log is not None:
+            stats.log.append((statement, elapsed))
+
+    def _observe_llm(self, seconds):
+        self.llm_latency.observe((), seconds)
+
+    # --- 慢请求日志 ---
+    def repeated_statements(self, statements):
+        """返回执行次数达到 N+1 阈值的 [(语句, 次数)]，按次数从多到少"""
+        counts = Counter(statement for statement, _ in statements)
+        return [
+            (statement, count)
+            for statement, count in counts.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def _log_slow_request(self, endpoint, status, elapsed, stats):
+        with self._lock:
+            self._totals["slow_requests"] += 1
+        header = (
+            f"Slow request: {request.method} {request.full_path.rstrip('?')} "
+            f"({endpoint}) -> {status} in {elapsed * 1000:.1f} ms, "
+            f"{stats.statements} SQL statements in {stats.db_seconds * 1000:.1f} ms"
+        )
+        lines = [header]
+        log = stats.log or []
+        for statement, count in self.repeated_statements(log):
+            lines.append(
+                f"  possible N+1: executed {count} times: {' '.join(statement.split())}"
+            )
+        for statement, seconds in log[:SLOW_LOG_MAX_STATEMENTS]:
+            lines.append(f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())}")
+        if len(log) > SLOW_LOG_MAX_STATEMENTS:
+            lines.append(f"  ... {len(log) - SLOW_LOG_MAX_STATEMENTS} more")
+        self._logger.warning("\n".join(lines))
+
+    # --- 输出 ---
+    def render(self):
+        """Prometheus 文本格式 (0.0.4) 的全部指标"""
+        from app import llm_client
+
+        lines = []
+        for histogram in self._histograms():
+            lines += histogram.render()
+        with self._lock:
+            totals = dict(self._totals)
+        lines += _sample(
+            "sql_statements_total",
+            "SQL statements executed, including outside requests.",
+            "counter",
+            totals["sql_statements"],
+        )
+        lines += _sample(
+            "sql_duration_seconds_total",
+            "Time spent executing SQL statements.",
+            "counter",
+            f"{totals['sql_seconds']:.6f}",
+        )
+        lines += _sample(
+            "http_slow_requests_total",
+            "Requests slower than METRICS_SLOW_REQUEST_MS.",
+            "counter",
+            totals["slow_requests"],
+        )
+
+        llm = llm_client.stats()
+        for key, name, help_text, kind in (
+            ("requests", "llm_requests_total", "Completed LLM calls.", "counter"),
+            ("errors", "llm_errors_total", "Failed LLM calls.", "counter"),
+            ("retries", "llm_retries_total", "Retried LLM attempts.", "counter"),
+            (
+                "busy_rejections",
+                "llm_busy_rejections_total",
+                "LLM calls rejected by the concurrency limit.",
+                "counter",
+            ),
+            ("in_flight", "llm_in_flight", "LLM calls in progress.", "gauge"),
+            (
+                "latency_seconds_total",
+                "llm_duration_seconds_total",
+                "Time spent waiting on the LLM.",
+                "counter",
+            ),
+        ):
+            lines += _sample(name, help_text, kind, llm[key])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+# app/json_provider.py
+"""可替换的 JSON 编码器。
+
+JSON_ENCODER=auto (默认) 时，安装了 orjson 就用它编码响应和解析请求体，
+否则保持 Flask 自带的 json 模块；=stdlib 强制使用标准库。
+orjson 的输出与默认实现在语义上等价：同样按键排序、日期同样按
+Flask 的 HTTP 日期格式输出；区别只在非 ASCII 字符直接以 UTF-8 输出而不转义。
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+ENCODERS = ("auto", "orjson", "stdlib")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """用 orjson 编码的 JSONProvider；orjson 无法处理的对象 (如超过 64 位的整数)
+    退回标准库实现"""
+
+    # 日期和 dataclass 交给 Flask 的 default() 处理，保持输出格式不变
+    _options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson
+        else 0
+    )
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = self._options
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # 调用方指定了 indent 等标准库参数
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._dumps_bytes(obj).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            data = self._dumps_bytes(obj, indent=indent)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app):
+    """按 JSON_ENCODER 配置替换 app.json"""
+    encoder = app.config.get("JSON_ENCODER", "auto")
+    if encoder not in ENCODERS:
+        raise ValueError(f"JSON_ENCODER must be one of {', '.join(ENCODERS)}")
+    if encoder == "orjson" and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson requires the orjson package")
+    if encoder != "stdlib" and orjson is not None:
+        app.json = OrjsonProvider(app)
+
+
+def dumps_line(obj):
+    """把一个对象编码成一行 JSON (保持键的顺序，不转义非 ASCII 字符)，供 NDJSON 导出使用"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False)
@@ -0,0 +1,266 @@
+# app/llm.py
+"""应用级共享的大模型客户端。
+
+LLMClient 在 create_app 中初始化一次，所有请求和后台任务共用：
+- 底层 httpx 连接池保持长连接，避免每次请求重新建立 TLS；
+- 连接超时和读取超时可配置，上游卡住时不会一直占着 worker；
+- 对超时、连接错误、限流和 5xx 按带抖动的指数退避重试，次数有上限；
+- 用信号量限制同时进行中的请求数；
+- 记录请求数、错误数、重试数和累计耗时，供监控使用；
+  add_observer() 注册的回调在每次调用结束时收到耗时 (秒)。
+
+stream() 使用流式接口逐段产出生成的文本；返回的 CompletionStream
+被关闭时 (例如客户端断开连接) 会同时关闭上游的 HTTP 响应，停止生成。
+
+后端通过 ADVICE_BACKEND 选择:
+- "dashscope": 通义千问 (OpenAI 兼容接口)，地址由 LLM_BASE_URL 配置，
+               测试时可以指向本地的假服务；
+- "stub":      本地假后端，按 ADVICE_STUB_LATENCY 秒延迟后返回固定格式的文本，
+               不访问网络。
+"""
+
+import random
+import threading
+import time
+
+import httpx
+import openai
+from openai import OpenAI
+
+DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# 这些错误通常是暂时性的，值得重试
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # 包括 APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMBusy(Exception):
+    """同时进行中的模型请求已达上限"""
+
+
+class CompletionStream:
+    """流式生成的文本片段；迭代完毕或调用 close() 时释放并发名额"""
+
+    def __init__(self, client, deltas, close_upstream, start):
+        self._client = client
+        self._deltas = deltas
+        self._close_upstream = close_upstream
+        self._start = start
+        self._closed = False
+
+    def __iter__(self):
+        try:
+            yield from self._deltas
+        except Exception:
+            self._client._count("errors")
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._close_upstream()
+        finally:
+            self._client._finish(self._start)
+
+
+class OpenAICompatibleBackend:
+    def __init__(self, api_key, base_url, connect_timeout, read_timeout, pool_size):
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http_client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+        # 重试由 LLMClient 统一处理，关闭 SDK 自带的重试
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0,
+            http_client=self.http_client,
+        )
+
+    def complete(self, model, messages):
+        completion = self.client.chat.completions.create(model=model, messages=messages)
+        return completion.choices[0].message.content
+
+    def stream(self, model, messages):
+        """发起流式请求，返回 (文本片段迭代器, 关闭函数)"""
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, stream=True
+        )
+
+        def deltas():
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        return deltas(), response.close
+
+    def close(self):
+        self.http_client.close()
+
+
+class StubBackend:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def complete(self, model, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._text(model, messages)
+
+    def stream(self, model, messages):
+        text = self._text(model, messages)
+        pieces = text.splitlines(keepends=True) or [text]
+        closed = threading.Event()
+
+        def deltas():
+            for piece in pieces:
+                # 把总延迟平均分摊到每一段上，关闭后立即停止
+                if closed.wait(self.latency / len(pieces)):
+                    return
+                yield piece
+
+        return deltas(), closed.set
+
+    def _text(self, model, messages):
+        return f"[{model} stub] {messages[-1]['content']}"
+
+    def close(self):
+        pass
+
+
+def create_backend(config):
+    name = config.get("ADVICE_BACKEND", "dashscope")
+    if name == "dashscope":
+        return OpenAICompatibleBackend(
+            api_key=config.get("DASHSCOPE_API_KEY") or "",
+            base_url=config.get("LLM_BASE_URL") or DASHSCOPE_BASE_URL,
+            connect_timeout=config.get("LLM_CONNECT_TIMEOUT", 5.0),
+            read_timeout=config.get("LLM_READ_TIMEOUT", 60.0),
+            pool_size=config.get("LLM_POOL_SIZE", 10),
+        )
+    if name == "stub":
+        return StubBackend(latency=config.get("ADVICE_STUB_LATENCY", 0.0))
+    raise ValueError(f"Unknown ADVICE_BACKEND: {name}")
+
+
+class LLMClient:
+    def __init__(self, app=None):
+        self.backend = None
+        self.max_retries = 2
+        self.retry_backoff = 0.5
+        self.acquire_timeout = 5.0
+        self._slots = threading.BoundedSemaphore(8)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._observers = []
+        self.reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = create_backend(app.config)
+        self.max_retries = app.config.get("LLM_MAX_RETRIES", self.max_retries)
+        self.retry_backoff = app.config.get("LLM_RETRY_BACKOFF", self.retry_backoff)
+        self.acquire_timeout = app.config.get(
+            "LLM_ACQUIRE_TIMEOUT", self.acquire_timeout
+        )
+        self._slots = threading.BoundedSemaphore(
+            app.config.get("LLM_MAX_CONCURRENCY", 8)
+        )
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "busy_rejections": 0,
+                "in_flight": 0,
+                "latency_seconds_total": 0.0,
+            }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def add_observer(self, callback):
+        """注册 callback(seconds)，每次模型调用结束 (含重试和流式输出) 时调用"""
+        if callback not in self._observers:
+            self._observers.append(callback)
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _backoff(self, attempt):
+        # 指数退避加全抖动: [0, backoff * 2^attempt)
+        return random.uniform(0, self.retry_backoff * (2**attempt))
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count("busy_rejections")
+            raise LLMBusy("Too many concurrent LLM requests")
+        self._count("in_flight")
+        return time.perf_counter()
+
+    def _finish(self, start):
+        self._slots.release()
+        self._count("in_flight", -1)
+        self._count("requests")
+        elapsed = time.perf_counter() - start
+        self._count("latency_seconds_total", elapsed)
+        for callback in self._observers:
+            callback(elapsed)
+
+    def _with_retries(self, fn, *args):
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+
+    def complete(self, model, messages):
+        """调用模型生成回复；超过并发上限时抛出 LLMBusy"""
+        start = self._acquire()
+        try:
+            return self._with_retries(self.backend.complete, model, messages)
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._finish(start)
+
+    def stream(self, model, messages):
+        """以流式方式调用模型，返回 CompletionStream
+
+        只有建立连接、拿到响应之前的失败会重试；开始产出文本之后不再重试。
+        """
+        start = self._acquire()
+        try:
+            deltas, close_upstream = self._with_retries(
+                self.backend.stream, model, messages
+            )
+        except Exception:
+            self._count("errors")
+            self._finish(start)
+            raise
+        return CompletionStream(self, deltas, close_upstream, start)
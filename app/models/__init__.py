@@ -1,3 +1,4 @@
 from .user import User
 from .category import Category
 from .transaction import Transaction
+from .daily_rollup import DailyRollup
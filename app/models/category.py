@@ -3,6 +3,7 @@ from app import db
 
 class Category(db.Model):
     __tablename__ = "categories"
+    __table_args__ = (db.Index("ix_categories_user_id", "user_id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
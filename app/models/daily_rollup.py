@@ -0,0 +1,33 @@
+from app import db
+
+
+class DailyRollup(db.Model):
+    """按 (用户, 日期, 类型, 分类) 预聚合的每日收支，由 app.rollups 负责维护"""
+
+    __tablename__ = "daily_rollups"
+    __table_args__ = (
+        db.Index(
+            "ux_daily_rollups_key",
+            "user_id",
+            "date",
+            "type",
+            "category_id",
+            unique=True,
+        ),
+        # 删除分类时按 category_id 合并汇总数据
+        db.Index("ix_daily_rollups_category_id", "category_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    type = db.Column(db.String(10), nullable=False)  # 'income' or 'expense'
+    # 收入和未分类的支出此项为空
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
+
+    # 金额合计，单位为分
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyRollup {self.user_id} {self.date} {self.type}>"
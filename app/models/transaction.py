@@ -1,12 +1,41 @@
 from app import db
+from app.money import from_cents, to_cents
 from datetime import date
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 class Transaction(db.Model):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # 列表分页: WHERE user_id = ? ORDER BY transaction_date DESC, id DESC
+        db.Index("ix_transactions_user_date_id", "user_id", "transaction_date", "id"),
+        # 仪表盘/AI建议的聚合查询: 按用户、类型、日期范围过滤，
+        # 附带 category_id 与 amount_cents 使其成为覆盖索引，无需回表
+        db.Index(
+            "ix_transactions_user_type_date",
+            "user_id",
+            "type",
+            "transaction_date",
+            "category_id",
+            "amount_cents",
+        ),
+        # 列表按分类过滤: WHERE user_id = ? AND category_id IN (...) ORDER BY 日期
+        db.Index(
+            "ix_transactions_user_category_date_id",
+            "user_id",
+            "category_id",
+            "transaction_date",
+            "id",
+        ),
+        # 列表按金额排序或按金额区间过滤
+        db.Index("ix_transactions_user_amount_id", "user_id", "amount_cents", "id"),
+        # 删除分类时按 category_id 批量置空
+        db.Index("ix_transactions_category_id", "category_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    # 金额以整数分存储，求和等聚合不经过 Decimal；按元读写使用 amount
+    amount_cents = db.Column(db.BigInteger, nullable=False)
     type = db.Column(db.String(10), nullable=False)  # 'income' or 'expense'
     transaction_date = db.Column(db.Date, nullable=False, default=date.today)
     notes = db.Column(db.Text, nullable=True)
@@ -16,5 +45,21 @@ class Transaction(db.Model):
     # 外键，关联到类别ID。收入记录此项为空。
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
 
+    @hybrid_property
+    def amount(self):
+        """金额 (元)，两位小数的 Decimal"""
+        if self.amount_cents is None:
+            return None
+        return from_cents(self.amount_cents)
+
+    @amount.inplace.setter
+    def _amount_setter(self, value):
+        self.amount_cents = to_cents(value)
+
+    @amount.inplace.expression
+    @classmethod
+    def _amount_expression(cls):
+        return cls.amount_cents / 100
+
     def __repr__(self):
         return f"<Transaction {self.id}>"
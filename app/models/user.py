@@ -1,6 +1,5 @@
-import bcrypt
 from datetime import datetime
-from app import db
+from app import db, password_hasher
 
 
 class User(db.Model):
@@ -16,17 +15,17 @@ class User(db.Model):
     categories = db.relationship("Category", backref="creator", lazy=True)
 
     def set_password(self, password):
-        """使用 bcrypt 对密码进行哈希加密"""
+        """使用 bcrypt 对密码进行哈希加密 (代价因子由 BCRYPT_LOG_ROUNDS 配置)"""
         # A salt is generated automatically by bcrypt
-        self.password_hash = bcrypt.hashpw(
-            password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """校验密码是否正确"""
-        return bcrypt.checkpw(
-            password.encode("utf-8"), self.password_hash.encode("utf-8")
-        )
+        return password_hasher.check(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        """已存储的哈希与当前配置的代价因子不一致时返回 True"""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -0,0 +1,48 @@
+# app/money.py
+"""金额在库中以整数“分”存储 (Transaction.amount_cents、DailyRollup.total_cents)。
+
+求和等聚合在数据库和 Python 中都是整数运算；只在解析用户输入和
+输出 API 响应时与 "12.30" 形式的字符串互相转换。
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+_CENT = Decimal("0.01")
+# 与原 Numeric(10, 2) 列的上限一致 (99999999.99)，也远小于 SQLite INTEGER 的范围
+MAX_CENTS = 9999999999
+
+
+def to_cents(value):
+    """把用户输入的金额 (字符串/数字/Decimal) 转成整数分。
+
+    格式不合法或绝对值超过 MAX_CENTS 时抛出 ValueError。
+    """
+    if isinstance(value, bool):
+        raise ValueError("Invalid amount")
+    if isinstance(value, int):
+        cents = value * 100
+    else:
+        try:
+            amount = value if isinstance(value, Decimal) else Decimal(str(value))
+            if not amount.is_finite():
+                raise ValueError("Invalid amount")
+            # 位数超过 decimal 上下文精度时 quantize 抛出 InvalidOperation
+            cents = int(amount.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+        except ArithmeticError:
+            raise ValueError("Invalid amount")
+    if abs(cents) > MAX_CENTS:
+        raise ValueError("Amount out of range")
+    return cents
+
+
+def format_cents(cents):
+    """整数分 -> "12.30" 形式的字符串 (与原 Numeric(10, 2) 列的 str() 结果一致)。
+
+    |cents| < 2**53 时 cents / 100 与真实值的误差远小于 0.005，按两位小数格式化结果精确。
+    """
+    return f"{cents / 100:.2f}"
+
+
+def from_cents(cents):
+    """整数分 -> 两位小数的 Decimal"""
+    return Decimal(int(cents)).scaleb(-2)
@@ -0,0 +1,71 @@
+# app/passwords.py
+"""bcrypt 密码哈希，放到有界线程池中执行。
+
+bcrypt 计算期间会释放 GIL，在独立线程池中执行可以让多个哈希真正并行，
+同时把同时进行的哈希数量限制在 PASSWORD_HASH_WORKERS 个以内。
+排队的任务超过 PASSWORD_HASH_QUEUE_LIMIT 时直接抛出 PasswordHasherBusy，
+由接口返回 503，避免登录洪峰把所有 worker 都卡住。
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """哈希线程池已满"""
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.rounds = 12
+        self._executor = None
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", self.rounds)
+        workers = app.config.get("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1
+        queue_limit = app.config.get("PASSWORD_HASH_QUEUE_LIMIT") or workers * 4
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        # 正在执行和排队中的任务总数上限
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            # 未绑定应用 (例如在脚本中直接使用模型) 时同步执行
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+    def check(self, password, password_hash):
+        return self._run(
+            bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8")
+        )
+
+    def needs_rehash(self, password_hash):
+        """哈希的代价因子与当前配置不一致时返回 True"""
+        # bcrypt 哈希格式: $2b$<cost>$<salt+hash>
+        parts = password_hash.split("$")
+        if len(parts) < 4 or not parts[2].isdigit():
+            return True
+        return int(parts[2]) != self.rounds
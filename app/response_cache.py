@@ -0,0 +1,334 @@
+# app/response_cache.py
+"""按用户缓存接口响应，并用数据版本号生成 ETag。
+
+每个用户有一个版本计数器，交易和分类的写接口在提交后调用
+bump_user_version() 使其递增；seed 命令修改全局预设分类时调用
+bump_global_version()。缓存键和 ETag 都包含版本号，所以写操作之后
+旧的缓存条目自然失效，不需要逐条删除。
+
+memory 后端的版本号只存在于当前进程，重启后从 0 开始，可能与重启前发出的
+ETag 重复；因此这种情况下 ETag 里还带有进程启动时生成的随机值，重启前的
+ETag 不会再被当作有效。
+
+写接口同时记录写入时间，sync-replica 记录每次复制开始的时间；@read_only
+接口据此判断只读副本是否已经包含当前用户最近的写入，没有时改读主库，
+避免把副本上的旧数据缓存到新的版本号下。
+
+后端可插拔:
+- "sqlite": 基于本地 SQLite 文件，默认值，多个 worker 共享缓存和版本号；
+- "memory": 进程内 LRU + TTL，只能用于单进程部署。多个 worker 时各进程的版本号
+  互不相通，其他进程处理的写操作不会使本进程的缓存和 ETag 失效。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request
+
+
+class MemoryBackend:
+    """进程内的 LRU 缓存，条目超过 ttl 秒后失效"""
+
+    # 数据只在当前进程内可见，重启后丢失
+    shared = False
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (过期时间, value)
+        self._counters = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def set_counter(self, key, value):
+        with self._lock:
+            self._counters[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class SQLiteBackend:
+    """基于 SQLite 文件的共享缓存，同一台机器上的多个 worker 可以共用"""
+
+    # 每写入这么多次清理一次过期和超出容量的条目
+    PRUNE_EVERY = 100
+    shared = True
+
+    def __init__(self, path, max_entries=1024, ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl, now),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune(conn, now)
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM entries WHERE key NOT IN "
+            "(SELECT key FROM entries ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def get_counter(self, key):
+        row = (
+            self._connect()
+            .execute("SELECT value FROM counters WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def incr(self, key):
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO counters (key, value) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+        return self.get_counter(key)
+
+    def set_counter(self, key, value):
+        self._connect().execute(
+            "INSERT INTO counters (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM counters")
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend}
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def create_backend(name, max_entries, ttl, path):
+    """按名称创建后端；path 只用于 sqlite 后端"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+    if name == "sqlite":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return SQLiteBackend(path, max_entries=max_entries, ttl=ttl)
+    return MemoryBackend(max_entries=max_entries, ttl=ttl)
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = None
+        # 版本号不能跨进程、跨重启保持时加入 ETag 的随机值
+        self.instance_id = ""
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = create_backend(
+            app.config.get("RESPONSE_CACHE_BACKEND", "sqlite"),
+            max_entries=app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024),
+            ttl=app.config.get("RESPONSE_CACHE_TTL", 300),
+            path=app.config.get("RESPONSE_CACHE_PATH")
+            or os.path.join(app.instance_path, "response_cache.db"),
+        )
+        self.instance_id = "" if self.backend.shared else uuid.uuid4().hex[:8]
+
+    # --- 数据版本号 ---
+    def user_version(self, user_id):
+        return self.backend.get_counter(f"version:user:{user_id}")
+
+    def bump_user_version(self, user_id):
+        """用户的交易或分类发生变化后调用，使该用户的缓存和 ETag 失效"""
+        # 先记录写入时间再递增版本号: 看到新版本号的请求一定也能看到这次写入
+        self.backend.set_counter(f"written:user:{user_id}", _now_ms())
+        return self.backend.incr(f"version:user:{user_id}")
+
+    def global_version(self):
+        return self.backend.get_counter("version:global")
+
+    def bump_global_version(self):
+        """预设分类等所有用户共享的数据发生变化后调用"""
+        self.backend.set_counter("written:global", _now_ms())
+        return self.backend.incr("version:global")
+
+    # --- 只读副本的同步进度 ---
+    def mark_replica_synced(self, started_at):
+        """sync-replica 完成一次复制后调用，started_at 为开始复制的时间 (毫秒)"""
+        self.backend.set_counter("replica:synced_at", started_at)
+
+    def replica_is_current(self, user_id):
+        """该用户 (以及全局数据) 最近一次写入是否已经复制到只读副本"""
+        written = max(
+            self.backend.get_counter(f"written:user:{user_id}"),
+            self.backend.get_counter("written:global"),
+        )
+        return written == 0 or written < self.backend.get_counter("replica:synced_at")
+
+    def etag_for(self, scope, user_id):
+        """根据数据版本号、请求路径和参数计算 ETag，不需要生成响应体"""
+        fingerprint = (
+            request.path
+            + "?"
+            + "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        )
+        # 仪表盘等接口的结果依赖"今天"，日期变化后同样需要失效
+        digest = hashlib.sha1(
+            f"{fingerprint}|{datetime.utcnow().date().isoformat()}".encode("utf-8")
+        ).hexdigest()[:16]
+        version = f"{self.user_version(user_id)}-{self.global_version()}"
+        if self.instance_id:
+            version = f"{self.instance_id}.{version}"
+        return f"{scope}-{user_id}-{version}-{digest}"
+
+    @staticmethod
+    def _not_modified(etag):
+        response = current_app.response_class(status=304)
+        return ResponseCache._add_validators(response, etag)
+
+    @staticmethod
+    def _add_validators(response, etag):
+        response.set_etag(etag, weak=True)
+        # 允许浏览器缓存，但每次使用前都要带上 If-None-Match 重新验证
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def conditional(self, scope):
+        """只做条件请求、不缓存响应体，放在 token_required 之后使用。
+
+        ETag 只由数据版本号和请求参数决定，If-None-Match 命中时在执行接口函数
+        之前直接返回 304；适合响应体较大或参数组合很多、不值得缓存的列表接口。
+        """
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(current_user, *args, **kwargs):
+                etag = self.etag_for(scope, current_user.id)
+                if request.if_none_match.contains_weak(etag):
+                    return self._not_modified(etag)
+                response = current_app.make_response(f(current_user, *args, **kwargs))
+                if response.status_code == 200:
+                    self._add_validators(response, etag)
+                return response
+
+            return decorated
+
+        return decorator
+
+    def cached(self, scope):
+        """缓存 GET 接口的响应，放在 token_required 之后使用。
+
+        If-None-Match 命中时直接返回 304；缓存命中时直接返回缓存的响应体；
+        否则执行接口函数，并缓存状态码为 200 的响应。
+        """
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(current_user, *args, **kwargs):
+                etag = self.etag_for(scope, current_user.id)
+                if request.if_none_match.contains_weak(etag):
+                    return self._not_modified(etag)
+
+                key = f"response:{etag}"
+                cached_body = self.backend.get(key)
+                if cached_body is not None:
+                    response = current_app.response_class(
+                        cached_body, mimetype="application/json"
+                    )
+                else:
+                    response = current_app.make_response(
+                        f(current_user, *args, **kwargs)
+                    )
+                    if response.status_code != 200:
+                        return response
+                    self.backend.set(key, response.get_data())
+
+                return self._add_validators(response, etag)
+
+            return decorated
+
+        return decorator
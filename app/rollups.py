@@ -0,0 +1,166 @@
+# app/rollups.py
+"""daily_rollups 预聚合表的维护逻辑。
+
+通过 ORM 增删改的交易记录由下面的 mapper 事件自动同步到汇总表；
+绕过 ORM 的批量语句 (例如 Query.update) 需要在同一事务中显式调用
+apply_deltas() / reassign_category()。汇总表出现偏差时可以用
+`flask rebuild-rollups` 从 transactions 全量重建。
+"""
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, select, update
+
+from app.models import DailyRollup, Transaction
+
+rollups = DailyRollup.__table__
+
+
+def _key(user_id, tx_date, tx_type, category_id):
+    return (user_id, tx_date, tx_type, category_id)
+
+
+def add_delta(deltas, key, cents, count):
+    """把一笔变化累加进 deltas 字典: key -> [金额变化 (分), 笔数变化]"""
+    entry = deltas.setdefault(key, [0, 0])
+    entry[0] += cents
+    entry[1] += count
+
+
+def apply_deltas(connection, deltas):
+    """把累计的变化写入汇总表；笔数归零的行会被删除"""
+    for (user_id, tx_date, tx_type, category_id), (cents, count) in deltas.items():
+        if not cents and not count:
+            continue
+        # category_id 为 None 时 == 会被编译成 IS NULL
+        match = and_(
+            rollups.c.user_id == user_id,
+            rollups.c.date == tx_date,
+            rollups.c.type == tx_type,
+            rollups.c.category_id == category_id,
+        )
+        result = connection.execute(
+            update(rollups)
+            .where(match)
+            .values(
+                total_cents=rollups.c.total_cents + cents,
+                count=rollups.c.count + count,
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(
+                insert(rollups).values(
+                    user_id=user_id,
+                    date=tx_date,
+                    type=tx_type,
+                    category_id=category_id,
+                    total_cents=cents,
+                    count=count,
+                )
+            )
+        elif count < 0:
+            connection.execute(delete(rollups).where(match, rollups.c.count <= 0))
+
+
+def reassign_category(connection, old_category_id, new_category_id):
+    """把某个分类下的汇总数据整体并入另一个分类 (None 表示未分类)"""
+    rows = connection.execute(
+        select(
+            rollups.c.user_id,
+            rollups.c.date,
+            rollups.c.type,
+            rollups.c.total_cents,
+            rollups.c.count,
+        ).where(rollups.c.category_id == old_category_id)
+    ).all()
+    deltas = {}
+    for user_id, tx_date, tx_type, total, count in rows:
+        add_delta(
+            deltas, _key(user_id, tx_date, tx_type, old_category_id), -total, -count
+        )
+        add_delta(
+            deltas, _key(user_id, tx_date, tx_type, new_category_id), total, count
+        )
+    apply_deltas(connection, deltas)
+
+
+def rebuild(connection, user_id=None):
+    """从 transactions 全量重建汇总表，传入 user_id 时只重建该用户"""
+    source = select(
+        Transaction.user_id,
+        Transaction.transaction_date,
+        Transaction.type,
+        Transaction.category_id,
+        func.sum(Transaction.amount_cents),
+        func.count(Transaction.id),
+    ).group_by(
+        Transaction.user_id,
+        Transaction.transaction_date,
+        Transaction.type,
+        Transaction.category_id,
+    )
+    clear = delete(rollups)
+    if user_id is not None:
+        source = source.where(Transaction.user_id == user_id)
+        clear = clear.where(rollups.c.user_id == user_id)
+
+    connection.execute(clear)
+    result = connection.execute(
+        insert(rollups).from_select(
+            ["user_id", "date", "type", "category_id", "total_cents", "count"], source
+        )
+    )
+    return result.rowcount
+
+
+def _previous(state, attr):
+    """取属性在本次 flush 之前的值"""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), attr)
+
+
+def _transaction_key(target):
+    return _key(
+        target.user_id, target.transaction_date, target.type, target.category_id
+    )
+
+
+@event.listens_for(Transaction, "after_insert")
+def _after_insert(mapper, connection, target):
+    deltas = {}
+    add_delta(deltas, _transaction_key(target), target.amount_cents, 1)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Transaction, "after_update")
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    old_key = _key(
+        _previous(state, "user_id"),
+        _previous(state, "transaction_date"),
+        _previous(state, "type"),
+        _previous(state, "category_id"),
+    )
+    old_cents = _previous(state, "amount_cents")
+    new_key = _transaction_key(target)
+    if old_key == new_key and old_cents == target.amount_cents:
+        return
+
+    deltas = {}
+    add_delta(deltas, old_key, -old_cents, -1)
+    add_delta(deltas, new_key, target.amount_cents, 1)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Transaction, "after_delete")
+def _after_delete(mapper, connection, target):
+    state = inspect(target)
+    old_key = _key(
+        _previous(state, "user_id"),
+        _previous(state, "transaction_date"),
+        _previous(state, "type"),
+        _previous(state, "category_id"),
+    )
+    deltas = {}
+    add_delta(deltas, old_key, -_previous(state, "amount_cents"), -1)
+    apply_deltas(connection, deltas)
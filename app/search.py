@@ -0,0 +1,175 @@
+# app/search.py
+"""交易备注 (Transaction.notes) 的全文搜索，供 GET /api/transactions/search 使用。
+
+SQLite 上使用 FTS5 虚拟表 transactions_fts，以 transactions 为外部内容表，
+只保存 notes 和 user_id 的倒排索引，由触发器与 transactions 保持同步。
+user_id 也作为一列建进索引，MATCH 时直接限定用户，
+不必先匹配出所有用户的记录再逐条过滤。
+迁移负责在已有数据库上建表和回填；db.create_all() 建表时由下面的
+after_create 事件一并创建。
+
+查询时多个词之间为 AND，按 notes 列的 BM25 相关度排序。默认的 unicode61
+分词器不切分中日韩文字，"牙医复诊" 整体是一个词，搜 "复诊" 用索引找不到；
+因此含这类字符的词不走索引，改为在命中的记录上用 LIKE 按子串匹配，
+其余的词按前缀匹配 (词*)。所有词都含中日韩文字，或者非 SQLite 数据库
+(或 SQLite 未编译 FTS5) 时，退回按用户过滤的 LIKE 查询，按日期倒序返回。
+"""
+
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, event, func, inspect, select, text
+
+from app import db
+from app.models import Transaction
+
+FTS_TABLE = "transactions_fts"
+
+# 与迁移 9d3a6e8b2c57 中的语句保持一致
+CREATE_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "notes, user_id, content='transactions', content_rowid='id', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, notes, user_id) "
+    "VALUES (new.id, new.notes, new.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, notes, user_id) "
+    "VALUES ('delete', old.id, old.notes, old.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF notes, user_id "
+    f"ON transactions BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, notes, user_id) "
+    "VALUES ('delete', old.id, old.notes, old.user_id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, notes, user_id) "
+    "VALUES (new.id, new.notes, new.user_id); END",
+]
+
+for _statement in CREATE_STATEMENTS:
+    event.listen(
+        Transaction.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+
+INSERT_TRIGGER = CREATE_STATEMENTS[1]
+
+# 搜索词最多取这么多个，避免构造过长的 MATCH 表达式
+MAX_TERMS = 8
+# unicode61 分词器不会切分的文字: CJK 部首/假名/统一汉字、谚文、兼容汉字
+CJK_CHARACTERS = re.compile("[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+_fts_enabled = {}  # 引擎 URL -> 是否存在 FTS 表
+
+
+def fts_enabled():
+    """当前连接的数据库是否可以使用 FTS5 表"""
+    bind = db.session.get_bind(Transaction, clause=Transaction.__table__.select())
+    key = str(bind.url)
+    if key not in _fts_enabled:
+        _fts_enabled[key] = bind.dialect.name == "sqlite" and inspect(bind).has_table(
+            FTS_TABLE
+        )
+    return _fts_enabled[key]
+
+
+@contextmanager
+def bulk_load():
+    """大批量插入交易时使用: 期间删除逐行写索引的 INSERT 触发器，结束时用一条
+    INSERT ... SELECT 为新增的记录建索引并恢复触发器。
+
+    SQLite 的 DDL 也是事务性的，这些操作与插入在同一个事务中，
+    提交之前其他连接看不到缺少触发器的中间状态。
+    """
+    if not fts_enabled():
+        yield
+        return
+    connection = db.session.connection()
+    last_id = connection.execute(select(func.max(Transaction.id))).scalar() or 0
+    connection.execute(text("DROP TRIGGER IF EXISTS transactions_fts_ai"))
+    yield
+    connection.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE}(rowid, notes, user_id) "
+            "SELECT id, notes, user_id FROM transactions WHERE id > :last_id"
+        ),
+        {"last_id": last_id},
+    )
+    connection.execute(text(INSERT_TRIGGER))
+
+
+def split_terms(query):
+    """把搜索词分成 (可以用 FTS 索引按前缀匹配的词, 需要用 LIKE 按子串匹配的词)"""
+    terms = query.split()[:MAX_TERMS]
+    like_terms = [t for t in terms if CJK_CHARACTERS.search(t)]
+    index_terms = [t for t in terms if t not in like_terms]
+    return index_terms, like_terms
+
+
+def match_expression(user_id, terms):
+    """把搜索词转成安全的 FTS5 MATCH 表达式:
+    user_id:"42" AND notes:("词1"* "词2"*)
+    """
+    # 用双引号包裹后，用户输入中的 AND/OR/NEAR/* 等都按普通文本处理
+    phrases = " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+    return f'user_id:"{int(user_id)}" AND notes:({phrases})'
+
+
+def search(user_id, query, limit=20, offset=0):
+    """返回当前用户匹配的交易记录列表，按相关度 (或日期) 排序"""
+    if not query.split():
+        return []
+    if fts_enabled():
+        return _search_fts(user_id, query, limit, offset)
+    return _search_like(user_id, query, limit, offset)
+
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _search_fts(user_id, query, limit, offset):
+    index_terms, like_terms = split_terms(query)
+    if not index_terms:
+        return _search_like(user_id, query, limit, offset)
+    # MATCH 表达式已经限定了 user_id，不需要再连接 transactions 过滤；
+    # 中日韩文字的词只在命中的记录上用 LIKE 过滤
+    params = {
+        "match": match_expression(user_id, index_terms),
+        "limit": limit,
+        "offset": offset,
+    }
+    conditions = [f"{FTS_TABLE} MATCH :match"]
+    for n, term in enumerate(like_terms):
+        params[f"like{n}"] = _like_pattern(term)
+        conditions.append(f"notes LIKE :like{n} ESCAPE '\\'")
+    ids = (
+        db.session.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {' AND '.join(conditions)} "
+                # 权重: notes 1.0，user_id 0 (只用来过滤，不参与相关度)
+                f"ORDER BY bm25({FTS_TABLE}, 1.0, 0.0), rowid DESC "
+                "LIMIT :limit OFFSET :offset"
+            ),
+            params,
+        )
+        .scalars()
+        .all()
+    )
+    if not ids:
+        return []
+    # 只按主键取；再加 user_id 条件时 SQLite 会改走 (user_id, ...) 索引扫描该用户的全部记录
+    rows = Transaction.query.filter(Transaction.id.in_(ids)).all()
+    by_id = {t.id: t for t in rows if t.user_id == user_id}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def _search_like(user_id, query, limit, offset):
+    filters = [Transaction.user_id == user_id]
+    for term in query.split()[:MAX_TERMS]:
+        filters.append(Transaction.notes.ilike(_like_pattern(term), escape="\\"))
+    return (
+        Transaction.query.filter(*filters)
+        .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
@@ -0,0 +1,96 @@
+# app/serializers.py
+"""列表接口用的行序列化器。
+
+每个 RowSerializer 声明一组 (输出字段, 列[, 转换函数])：columns 给查询用，
+只 select 需要的列，不加载完整的 ORM 对象；dump_all 把查询得到的列元组
+转换成 dict 列表。取值函数 (itemgetter/attrgetter) 和转换函数在构造时
+准备好，逐行只需按顺序调用。
+
+lookups 声明“按某个字段的值到请求时传入的 dict 中查找”的输出字段，
+例如交易的 category_name 由 category_id 在分类缓存的 {id: 名称} 中查到。
+"""
+
+from datetime import date
+from operator import attrgetter, itemgetter
+
+from app.models import Category, Transaction
+from app.money import format_cents
+
+
+class RowSerializer:
+    def __init__(self, *fields, lookups=()):
+        """fields: (输出字段, 列) 或 (输出字段, 列, 转换函数)；
+        lookups: (输出字段, 来源字段)，来源字段须在 fields 中
+        """
+        self.fields = [(f[0], f[1], f[2] if len(f) > 2 else None) for f in fields]
+        self.columns = [column for _, column, _ in self.fields]
+        self.lookups = list(lookups)
+        # Row 按下标取值最快；ORM 对象和具名元组按属性取值
+        self._dump_rows = self._make_dump([itemgetter(i) for i in range(len(fields))])
+        self._dump_objects = self._make_dump(
+            [attrgetter(column.key) for _, column, _ in self.fields]
+        )
+
+    def _make_dump(self, getters):
+        """返回 dump(rows, lookups)，逐行按 (字段名, 取值函数, 转换函数) 生成 dict"""
+        entries = tuple(
+            (name, getter, convert)
+            for (name, _, convert), getter in zip(self.fields, getters)
+        )
+        names = [name for name, _, _ in self.fields]
+        # 以转换前的原始值作为查找键
+        lookup_entries = tuple(
+            (name, getters[names.index(source)]) for name, source in self.lookups
+        )
+
+        def dump(rows, lookups):
+            tables = [(name, getter, lookups[name]) for name, getter in lookup_entries]
+            items = []
+            for r in rows:
+                item = {}
+                for name, getter, convert in entries:
+                    value = getter(r)
+                    item[name] = value if convert is None else convert(value)
+                for name, getter, table in tables:
+                    item[name] = table.get(getter(r))
+                items.append(item)
+            return items
+
+        return dump
+
+    def dump_all(self, rows, **lookups):
+        """序列化 select(*columns) 得到的列元组 (Row)"""
+        return self._dump_rows(rows, lookups)
+
+    def dump(self, row, **lookups):
+        return self._dump_rows((row,), lookups)[0]
+
+    def dump_objects(self, objects, **lookups):
+        """序列化 ORM 对象或具名元组 (按列名取属性)"""
+        return self._dump_objects(objects, lookups)
+
+
+_TRANSACTION_FIELDS = (
+    ("id", Transaction.id),
+    ("amount", Transaction.amount_cents, format_cents),
+    ("type", Transaction.type),
+    ("transaction_date", Transaction.transaction_date, date.isoformat),
+    ("notes", Transaction.notes),
+    ("category_id", Transaction.category_id),
+)
+
+# 单条交易详情
+TRANSACTION = RowSerializer(*_TRANSACTION_FIELDS)
+# 列表/搜索结果，附带分类名称: dump_all(rows, category_name={id: 名称})
+TRANSACTION_ITEM = RowSerializer(
+    *_TRANSACTION_FIELDS, lookups=[("category_name", "category_id")]
+)
+# 导出: 字段顺序即 CSV 的列顺序，分类名称由查询连接 categories 取得
+TRANSACTION_EXPORT = RowSerializer(
+    *_TRANSACTION_FIELDS, ("category_name", Category.name)
+)
+CATEGORY = RowSerializer(
+    ("id", Category.id),
+    ("name", Category.name),
+    ("is_custom", Category.is_custom),
+)
@@ -0,0 +1,102 @@
+"""测量 token_required 带来的单次请求开销。
+
+分三种情况计时:
+- legacy:     旧实现，每次请求都 jwt.decode + User.query.get
+- cold:       关闭 Token 缓存 (TOKEN_CACHE_TTL=0)，每次都校验签名并确认用户存在
+- warm:       开启 Token 缓存，重复的 Token 直接命中缓存
+
+先单独测认证本身，再通过测试客户端测一个只读接口的端到端耗时。
+
+用法:
+    python benchmarks/bench_auth.py [--iterations 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import jwt
+from flask import current_app
+
+from app import create_app, db
+from app.api.decorators import authenticate
+from app.models import User
+from config import Config
+
+
+class BenchConfig(Config):
+    TESTING = True
+    # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+    ADVICE_JOB_BACKEND = "memory"
+    RESPONSE_CACHE_BACKEND = "memory"
+
+
+def legacy_authenticate(token):
+    data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    return User.query.get(data["sub"])
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(token_cache_ttl, iterations, db_path):
+    class Cfg(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        TOKEN_CACHE_TTL = token_cache_ttl
+
+    app = create_app(Cfg)
+    with app.app_context():
+        db.create_all()
+        if not User.query.filter_by(username="bench").first():
+            user = User(username="bench")
+            user.set_password("password")
+            db.session.add(user)
+            db.session.commit()
+
+        client = app.test_client()
+        token = client.post(
+            "/api/login", json={"username": "bench", "password": "password"}
+        ).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with app.test_request_context():
+            legacy = time_per_call(lambda: legacy_authenticate(token), iterations)
+            current = time_per_call(lambda: authenticate(token), iterations)
+            db.session.remove()
+
+        request_us = time_per_call(
+            lambda: client.get("/api/categories", headers=headers), iterations // 5
+        )
+    return legacy, current, request_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        legacy, cold, cold_request = run(0, args.iterations, db_path)
+        _, warm, warm_request = run(300, args.iterations, db_path)
+    finally:
+        os.remove(db_path)
+
+    print(f"{'path':<10}{'auth only (us)':>18}{'GET /api/categories (us)':>28}")
+    print(f"{'legacy':<10}{legacy:>18.1f}{'-':>28}")
+    print(f"{'cold':<10}{cold:>18.1f}{cold_request:>28.1f}")
+    print(f"{'warm':<10}{warm:>18.1f}{warm_request:>28.1f}")
+    print(f"\nauth speed-up (legacy / warm): {legacy / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""各接口的延迟与每次请求的 SQL 条数基准测试。
+
+脚本会在临时 SQLite 数据库上执行全部迁移，用 `flask seed` 写入预设分类，
+再用 app.datagen 生成 --users 个用户、每人 --tx-per-user 条交易的模拟数据，
+然后以其中一个用户的身份，通过 Flask 测试客户端把每个蓝图路由调用 --repeat 次，
+统计 p50/p95 延迟 (毫秒) 和每次请求执行的 SQL 条数 (中位数)。
+有写操作的场景在计时之外先准备好要修改/删除的记录。
+默认保留响应缓存，读接口在预热之后测到的是缓存命中；加 --cold 时每次请求前
+(计时之外) 递增该用户的数据版本号，相当于刚有过一次写操作，读接口都实际查库。
+URL 映射中没有被任何场景覆盖的蓝图路由会打印警告。
+
+结果可以用 --output 写成 JSON，之后用 --compare 与之前的结果比较：
+p50 变慢超过 --threshold 或 SQL 条数变多的场景视为退化，脚本以状态码 1 退出。
+
+用法:
+    python benchmarks/bench_endpoints.py --users 20 --tx-per-user 5000 --output base.json
+    python benchmarks/bench_endpoints.py --users 20 --tx-per-user 5000 --compare base.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_migrate import upgrade
+from sqlalchemy import event, select
+
+from app import create_app, datagen, db, response_cache
+from app.models import Category, Transaction, User
+from config import Config, basedir
+
+
+class BenchConfig(Config):
+    TESTING = True
+    # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+    ADVICE_JOB_BACKEND = "memory"
+    RESPONSE_CACHE_BACKEND = "memory"
+    ADVICE_BACKEND = "stub"
+    METRICS_TOKEN = "bench-metrics"
+
+
+def percentile(samples, p):
+    """最近秩法求百分位数"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class QueryCounter:
+    """统计 before_cursor_execute 事件次数 (所有 bind 的引擎)"""
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+def build_scenarios(client, headers, user_id, username):
+    """返回 [(场景名, method, prepare)]；prepare() 在计时之外调用，返回 (url, 请求参数)"""
+    today = date.today()
+    start = (today - timedelta(days=365)).isoformat()
+    preset_id = db.session.execute(
+        select(Category.id).where(Category.is_custom.is_(False)).limit(1)
+    ).scalar()
+    first_id = db.session.execute(
+        select(Transaction.id).where(Transaction.user_id == user_id).limit(1)
+    ).scalar()
+    counter = iter(range(1, 1 << 30))
+
+    def create_transaction():
+        response = client.post(
+            "/api/transactions",
+            headers=headers,
+            json={
+                "amount": "9.90",
+                "type": "expense",
+                "transaction_date": today.isoformat(),
+                "category_id": preset_id,
+            },
+        )
+        return response.get_json()["id"]
+
+    def create_category():
+        response = client.post(
+            "/api/categories", headers=headers, json={"name": f"bench{next(counter)}"}
+        )
+        return response.get_json()["id"]
+
+    def fixed(url, **kwargs):
+        return lambda: (url, kwargs)
+
+    def submit_advice():
+        job = client.post(
+            "/api/advice",
+            headers=headers,
+            json={"start_date": start, "end_date": today.isoformat()},
+        ).get_json()
+        return f"/api/advice/jobs/{job['job_id']}", {}
+
+    import_body = "amount,type,transaction_date,category_id,notes\n" + "".join(
+        f"{n % 50 + 1}.00,expense,{today.isoformat()},{preset_id},导入{n}\n"
+        for n in range(100)
+    )
+
+    return [
+        (
+            "login",
+            "POST",
+            fixed("/api/login", json={"username": username, "password": "password"}),
+        ),
+        (
+            "register",
+            "POST",
+            lambda: (
+                "/api/register",
+                {"json": {"username": f"bench{next(counter)}", "password": "password"}},
+            ),
+        ),
+        ("list page 1", "GET", fixed("/api/transactions?page=1&per_page=20")),
+        ("list page 50", "GET", fixed("/api/transactions?page=50&per_page=20")),
+        (
+            "list cursor+total",
+            "GET",
+            fixed("/api/transactions?cursor=&per_page=20&include_total=1"),
+        ),
+        (
+            "list filtered",
+            "GET",
+            fixed(
+                f"/api/transactions?cursor=&per_page=20&type=expense"
+                f"&category_id={preset_id}&start={start}&sort=-amount"
+            ),
+        ),
+        ("search", "GET", fixed("/api/transactions/search?q=星巴克")),
+        ("detail", "GET", fixed(f"/api/transactions/{first_id}")),
+        ("export csv 1y", "GET", fixed(f"/api/transactions/export?start={start}")),
+        (
+            "create transaction",
+            "POST",
+            fixed(
+                "/api/transactions",
+                json={
+                    "amount": "12.30",
+                    "type": "expense",
+                    "transaction_date": today.isoformat(),
+                    "category_id": preset_id,
+                },
+            ),
+        ),
+        (
+            "update transaction",
+            "PUT",
+            lambda: (
+                f"/api/transactions/{create_transaction()}",
+                {"json": {"notes": "updated"}},
+            ),
+        ),
+        (
+            "delete transaction",
+            "DELETE",
+            lambda: (f"/api/transactions/{create_transaction()}", {}),
+        ),
+        (
+            "batch",
+            "POST",
+            lambda: (
+                "/api/transactions/batch",
+                {
+                    "json": {
+                        "operations": [
+                            {
+                                "op": "update",
+                                "id": create_transaction(),
+                                "fields": {"notes": "batch"},
+                            },
+                            {"op": "delete", "id": create_transaction()},
+                        ]
+                    }
+                },
+            ),
+        ),
+        (
+            "import csv 100",
+            "POST",
+            fixed(
+                "/api/transactions/import",
+                data=import_body.encode("utf-8"),
+                content_type="text/csv",
+            ),
+        ),
+        ("categories", "GET", fixed("/api/categories")),
+        (
+            "create category",
+            "POST",
+            lambda: ("/api/categories", {"json": {"name": f"bench{next(counter)}"}}),
+        ),
+        (
+            "update category",
+            "PUT",
+            lambda: (
+                f"/api/categories/{create_category()}",
+                {"json": {"name": f"bench{next(counter)}"}},
+            ),
+        ),
+        (
+            "delete category",
+            "DELETE",
+            lambda: (f"/api/categories/{create_category()}", {}),
+        ),
+        ("dashboard", "GET", fixed("/api/dashboard/summary")),
+        (
+            "analytics month",
+            "GET",
+            fixed("/api/analytics/series?granularity=month&group_by=category"),
+        ),
+        (
+            "analytics day",
+            "GET",
+            fixed(f"/api/analytics/series?granularity=day&start={start}"),
+        ),
+        (
+            "advice",
+            "POST",
+            fixed(
+                "/api/advice",
+                json={"start_date": start, "end_date": today.isoformat()},
+            ),
+        ),
+        ("advice job", "GET", submit_advice),
+        (
+            "metrics",
+            "GET",
+            fixed(
+                "/api/metrics",
+                headers={"Authorization": f"Bearer {BenchConfig.METRICS_TOKEN}"},
+            ),
+        ),
+    ]
+
+
+def run_scenarios(app, scenarios, headers, repeat, warmup, before_each=None):
+    client = app.test_client()
+    adapter = app.url_map.bind("localhost")
+    covered = set()
+    results = {}
+    for name, method, prepare in scenarios:
+        latencies = []
+        queries = []
+        status = None
+        for n in range(warmup + repeat):
+            url, kwargs = prepare()
+            if before_each is not None:
+                before_each()
+            path = url.split("?", 1)[0]
+            covered.add(adapter.match(path, method=method)[0])
+            with QueryCounter(db.engines.values()) as counter:
+                started = time.perf_counter()
+                # 场景自带的请求头 (如 metrics 的令牌) 覆盖用户的 Token
+                request_headers = {**headers, **kwargs.get("headers", {})}
+                options = {k: v for k, v in kwargs.items() if k != "headers"}
+                response = client.open(
+                    url, method=method, headers=request_headers, **options
+                )
+                response.get_data()  # 流式响应读完才算结束
+                elapsed = time.perf_counter() - started
+            status = response.status_code
+            if n >= warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(counter.count)
+        results[name] = {
+            "method": method,
+            "url": url,
+            "status": status,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "queries": percentile(queries, 50),
+        }
+        row = results[name]
+        print(
+            f"{name:22}{method:>7}{status:>5}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['queries']:>9}"
+        )
+
+    uncovered = sorted(
+        rule.endpoint
+        for rule in app.url_map.iter_rules()
+        if "." in rule.endpoint
+        and rule.endpoint != "static"
+        and rule.endpoint not in covered
+    )
+    for endpoint in uncovered:
+        print(f"warning: no scenario covers {endpoint}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """打印与基线的差异，返回退化的场景数"""
+    regressions = 0
+    print(f"\n{'vs baseline':22}{'p50':>10}{'change':>9}{'queries':>11}")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:22}{'(new)':>10}")
+            continue
+        change = (row["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base else 0
+        slower = change > threshold
+        more_queries = row["queries"] > base["queries"]
+        flag = "  <-- regression" if slower or more_queries else ""
+        regressions += bool(flag)
+        print(
+            f"{name:22}{row['p50_ms']:>10.2f}{change:>+9.0%}"
+            f"{base['queries']:>5} -> {row['queries']:<3}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5, help="生成的用户数")
+    parser.add_argument(
+        "--tx-per-user", type=int, default=5000, help="每个用户的交易数"
+    )
+    parser.add_argument("--years", type=float, default=3, help="交易日期覆盖最近几年")
+    parser.add_argument("--repeat", type=int, default=20, help="每个场景计时的次数")
+    parser.add_argument("--warmup", type=int, default=2, help="每个场景预热的次数")
+    parser.add_argument(
+        "--cold", action="store_true", help="每次请求前使该用户的响应缓存失效"
+    )
+    parser.add_argument("--output", help="把结果写入这个 JSON 文件")
+    parser.add_argument("--compare", help="与之前 --output 写出的 JSON 比较")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="p50 变慢超过这个比例视为退化"
+    )
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    BenchConfig.SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+    app = create_app(BenchConfig)
+
+    try:
+        with app.app_context():
+            upgrade(directory=os.path.join(basedir, "migrations"))
+            app.test_cli_runner().invoke(args=["seed"])
+            started = time.perf_counter()
+            counts = datagen.generate(args.users, args.tx_per_user, args.years)
+            print(
+                f"Generated {counts['transactions']} transactions for "
+                f"{counts['users']} users in {time.perf_counter() - started:.1f}s"
+            )
+            user = User.query.filter_by(username="demo1").one()
+            login = app.test_client().post(
+                "/api/login",
+                json={"username": user.username, "password": datagen.DEFAULT_PASSWORD},
+            )
+            headers = {"Authorization": f"Bearer {login.get_json()['token']}"}
+            scenarios = build_scenarios(
+                app.test_client(), headers, user.id, user.username
+            )
+            db.session.remove()
+
+            print(
+                f"\n{'scenario':22}{'method':>7}{'code':>5}{'p50 ms':>10}"
+                f"{'p95 ms':>10}{'queries':>9}"
+            )
+            invalidate = None
+            if args.cold:
+                invalidate = partial(response_cache.bump_user_version, user.id)
+            results = run_scenarios(
+                app, scenarios, headers, args.repeat, args.warmup, invalidate
+            )
+    finally:
+        os.remove(db_path)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "users": args.users,
+            "tx_per_user": args.tx_per_user,
+            "years": args.years,
+            "repeat": args.repeat,
+            "cold": args.cold,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""登录吞吐量基准测试。
+
+用多个线程并发请求 /api/login，统计每秒成功登录数、延迟分位数以及
+因哈希线程池排满而返回 503 的次数。可以用不同的 --rounds / --workers /
+--queue-limit 组合对比调参效果。
+
+用法:
+    python benchmarks/bench_login.py --rounds 12 --concurrency 16 --requests 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app, db
+from app.models import User
+from config import Config
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt 代价因子")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=200, help="登录请求总数")
+    parser.add_argument("--workers", type=int, default=None, help="哈希线程数")
+    parser.add_argument("--queue-limit", type=int, default=None, help="哈希排队上限")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    class BenchConfig(Config):
+        TESTING = True
+        # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+        ADVICE_JOB_BACKEND = "memory"
+        RESPONSE_CACHE_BACKEND = "memory"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        BCRYPT_LOG_ROUNDS = args.rounds
+        PASSWORD_HASH_WORKERS = args.workers
+        PASSWORD_HASH_QUEUE_LIMIT = args.queue_limit
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+
+    def login(_):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post(
+            "/api/login", json={"username": "bench", "password": "password"}
+        )
+        return response.status_code, time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(login, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.remove(db_path)
+
+    ok = [latency for status, latency in results if status == 200]
+    busy = sum(1 for status, _ in results if status == 503)
+    other = len(results) - len(ok) - busy
+
+    print(
+        f"rounds={args.rounds} concurrency={args.concurrency} "
+        f"workers={args.workers or os.cpu_count()} queue_limit={args.queue_limit or 'default'}"
+    )
+    print(f"successful logins/s: {len(ok) / elapsed:.1f}")
+    if ok:
+        print(
+            f"latency ms: p50={percentile(ok, 50) * 1000:.1f} "
+            f"p95={percentile(ok, 95) * 1000:.1f} "
+            f"mean={statistics.mean(ok) * 1000:.1f}"
+        )
+    print(f"503 busy: {busy}  other errors: {other}")
+
+
+if __name__ == "__main__":
+    main()
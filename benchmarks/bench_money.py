@@ -0,0 +1,188 @@
+"""金额存储方式基准测试: Numeric(10, 2) 与整数分 (amount_cents)。
+
+在同一个临时 SQLite 库中建两张结构相同的交易表，一张金额列为 Numeric(10, 2)
+(改造前的写法，SQLAlchemy 逐行转换成 Decimal)，一张为 BigInteger 的分，
+各写入 --rows 条记录，比较:
+  sum-sql     数据库内按 (用户, 类型) SUM
+  sum-python  取出一个用户的全部金额后在 Python 中求和
+  serialize   取出一个用户的全部记录并格式化成 API 的 "12.30" 字符串
+
+用法:
+    python benchmarks/bench_money.py --rows 1000000 --users 100
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    create_engine,
+    func,
+    insert,
+    select,
+)
+
+from app.money import format_cents
+
+metadata = MetaData()
+legacy = Table(
+    "tx_numeric",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False, index=True),
+    Column("type", String(10), nullable=False),
+    Column("transaction_date", Date, nullable=False),
+    Column("amount", Numeric(10, 2), nullable=False),
+)
+cents = Table(
+    "tx_cents",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False, index=True),
+    Column("type", String(10), nullable=False),
+    Column("transaction_date", Date, nullable=False),
+    Column("amount_cents", BigInteger, nullable=False),
+)
+
+
+def populate(engine, rows, users, chunk_size=50000):
+    rng = random.Random(42)
+    today = date.today()
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk_size):
+            batch = []
+            for n in range(offset, min(rows, offset + chunk_size)):
+                amount_cents = rng.randint(100, 5_000_000)
+                batch.append(
+                    {
+                        "user_id": n % users,
+                        "type": "expense" if n % 4 else "income",
+                        "transaction_date": today - timedelta(days=n % 1460),
+                        "amount_cents": amount_cents,
+                        "amount": Decimal(amount_cents).scaleb(-2),
+                    }
+                )
+            conn.execute(insert(cents), batch)
+            conn.execute(insert(legacy), batch)
+
+
+def sum_sql(conn, table, column):
+    return conn.execute(
+        select(table.c.user_id, table.c.type, func.sum(column)).group_by(
+            table.c.user_id, table.c.type
+        )
+    ).all()
+
+
+def sum_python(conn, table, column, user_id):
+    return sum(conn.execute(select(column).where(table.c.user_id == user_id)).scalars())
+
+
+def serialize_numeric(conn, user_id):
+    stmt = select(legacy.c.id, legacy.c.amount, legacy.c.transaction_date).where(
+        legacy.c.user_id == user_id
+    )
+    return [
+        {"id": i, "amount": str(amount), "transaction_date": d.isoformat()}
+        for i, amount, d in conn.execute(stmt)
+    ]
+
+
+def serialize_cents(conn, user_id):
+    stmt = select(cents.c.id, cents.c.amount_cents, cents.c.transaction_date).where(
+        cents.c.user_id == user_id
+    )
+    return [
+        {"id": i, "amount": format_cents(amount), "transaction_date": d.isoformat()}
+        for i, amount, d in conn.execute(stmt)
+    ]
+
+
+def measure(fn, repeat):
+    """返回 (耗时中位数 毫秒, 结果)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="交易记录总数")
+    parser.add_argument("--users", type=int, default=100, help="用户数")
+    parser.add_argument("--repeat", type=int, default=5, help="每项的重复次数")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine("sqlite:///" + db_path)
+    try:
+        metadata.create_all(engine)
+        start = time.perf_counter()
+        populate(engine, args.rows, args.users)
+        print(
+            f"Inserted {args.rows} rows ({args.users} users) into each table "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        per_user = args.rows // args.users
+
+        with engine.connect() as conn:
+            cases = [
+                (
+                    "sum-sql",
+                    args.rows,
+                    lambda: sum_sql(conn, legacy, legacy.c.amount),
+                    lambda: sum_sql(conn, cents, cents.c.amount_cents),
+                ),
+                (
+                    "sum-python",
+                    per_user,
+                    lambda: sum_python(conn, legacy, legacy.c.amount, 0),
+                    lambda: sum_python(conn, cents, cents.c.amount_cents, 0),
+                ),
+                (
+                    "serialize",
+                    per_user,
+                    lambda: serialize_numeric(conn, 0),
+                    lambda: serialize_cents(conn, 0),
+                ),
+            ]
+            print(
+                f"{'case':12}{'rows':>10}{'Numeric':>14}{'cents':>14}"
+                f"{'rows/s (cents)':>18}{'speedup':>10}"
+            )
+            for label, rows, numeric_fn, cents_fn in cases:
+                numeric_ms, numeric_result = measure(numeric_fn, args.repeat)
+                cents_ms, cents_result = measure(cents_fn, args.repeat)
+                if label == "serialize":
+                    # 两种存储方式输出的字符串必须完全一致
+                    assert numeric_result == cents_result
+                print(
+                    f"{label:12}{rows:>10}{numeric_ms:11.1f} ms{cents_ms:11.1f} ms"
+                    f"{rows / cents_ms * 1000:>18,.0f}{numeric_ms / cents_ms:9.1f}x"
+                )
+    finally:
+        engine.dispose()
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
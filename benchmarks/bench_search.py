@@ -0,0 +1,147 @@
+"""交易备注全文搜索基准测试。
+
+生成 --rows 条带随机备注 (商户名 + 常见词) 的交易 (分属 --users 个用户)，分别用 FTS5 索引和
+LIKE '%词%' 回退方案执行同一组搜索，比较延迟分位数。
+
+用法:
+    python benchmarks/bench_search.py --rows 1000000 --users 100
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert
+
+from app import create_app, db, search
+from app.models import Transaction, User
+from config import Config
+
+WORDS = (
+    "coffee lunch dinner taxi subway rent dentist doctor pharmacy gym book "
+    "movie concert grocery market gift flight hotel insurance phone internet "
+    "午饭 晚饭 打车 地铁 房租 牙医 药店 健身 电影 超市 礼物 机票 酒店 话费"
+).split()
+# 备注里的商户名有很长的长尾，大部分搜索词只命中少量记录
+MERCHANTS = 50_000
+QUERIES = [
+    "dent",
+    "coffee",
+    "grocery market",
+    "牙医",
+    "merchant1234",
+    "merchant42 taxi",
+    "merchant777",
+    "hotel fli",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(rows, users, chunk_size=20000):
+    rng = random.Random(42)
+    db.session.add_all(
+        User(username=f"user{i}", password_hash="x") for i in range(users)
+    )
+    db.session.commit()
+    user_ids = [u.id for u in User.query.all()]
+    today = date.today()
+    table = Transaction.__table__
+
+    start = time.perf_counter()
+    batch = []
+    for n in range(rows):
+        batch.append(
+            {
+                "user_id": user_ids[n % len(user_ids)],
+                "amount_cents": rng.randint(100, 50000),
+                "type": "expense",
+                "transaction_date": today - timedelta(days=n % 730),
+                "notes": " ".join(
+                    [f"merchant{rng.randrange(MERCHANTS)}"]
+                    + rng.sample(WORDS, rng.randint(1, 3))
+                ),
+                "category_id": None,
+            }
+        )
+        if len(batch) >= chunk_size:
+            db.session.execute(insert(table), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(insert(table), batch)
+    db.session.commit()
+    return time.perf_counter() - start
+
+
+def measure(fn, user_id, query, repeat):
+    """返回某个搜索词 repeat 次执行的耗时 (毫秒) 列表"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(user_id, query, 20, 0)
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="交易记录总数")
+    parser.add_argument("--users", type=int, default=100, help="用户数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个搜索词的重复次数")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    class BenchConfig(Config):
+        TESTING = True
+        # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+        ADVICE_JOB_BACKEND = "memory"
+        RESPONSE_CACHE_BACKEND = "memory"
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+
+    app = create_app(BenchConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            elapsed = populate(args.rows, args.users)
+            print(
+                f"Inserted {args.rows} rows ({args.users} users) with FTS triggers "
+                f"in {elapsed:.1f}s"
+            )
+            user_id = User.query.first().id
+
+            engines = (("FTS5", search._search_fts), ("LIKE", search._search_like))
+            totals = {label: [] for label, _ in engines}
+            print(f"{'query':20}" + "".join(f"{label:>14}" for label, _ in engines))
+            for query in QUERIES:
+                line = f"{query:20}"
+                for label, fn in engines:
+                    timings = measure(fn, user_id, query, args.repeat)
+                    totals[label] += timings
+                    line += f"{statistics.median(timings):11.2f} ms"
+                print(line)
+            for label, timings in totals.items():
+                print(
+                    f"{label:5} p50 {statistics.median(timings):8.2f} ms"
+                    f"   p95 {percentile(timings, 95):8.2f} ms"
+                    f"   max {max(timings):8.2f} ms"
+                )
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""交易列表序列化基准测试 (每秒处理的行数)。
+
+在内存 SQLite 库中写入 --rows 条交易，按 --per-page 条一页反复取数并编码成 JSON，比较:
+  orm+dict    加载完整 ORM 对象、逐字段手写 dict (改造前的写法)，标准库 json 编码
+  columns     只 select 需要的列，RowSerializer 生成 dict，标准库 json 编码
+  columns+orjson  同上，用 OrjsonProvider 编码 (未安装 orjson 时跳过)
+另外单独给出“只序列化”和“只编码”两步的吞吐，便于看出耗时分布。
+
+用法:
+    python benchmarks/bench_serialize.py --rows 100000 --per-page 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+
+from app import category_cache, create_app, db, json_provider
+from app.models import Transaction, User
+from app.money import format_cents
+from app.serializers import TRANSACTION_ITEM
+from config import Config
+
+
+def populate(rows):
+    rng = random.Random(42)
+    user = User(username="bench", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    today = date.today()
+    db.session.execute(
+        insert(Transaction.__table__),
+        [
+            {
+                "user_id": user.id,
+                "amount_cents": rng.randint(100, 500000),
+                "type": "expense" if n % 4 else "income",
+                "transaction_date": today - timedelta(days=n % 1460),
+                "notes": f"merchant{rng.randrange(5000)} 午饭" if n % 3 else None,
+                "category_id": 1 + n % 8 if n % 4 else None,
+            }
+            for n in range(rows)
+        ],
+    )
+    db.session.commit()
+    return user.id
+
+
+def page_orm(user_id, per_page, page, category_names):
+    rows = (
+        Transaction.query.filter(Transaction.user_id == user_id)
+        .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+        .limit(per_page)
+        .offset(page * per_page)
+        .all()
+    )
+    return [
+        {
+            "id": t.id,
+            "amount": format_cents(t.amount_cents),
+            "type": t.type,
+            "transaction_date": t.transaction_date.isoformat(),
+            "notes": t.notes,
+            "category_id": t.category_id,
+            "category_name": category_names.get(t.category_id),
+        }
+        for t in rows
+    ]
+
+
+def page_columns(user_id, per_page, page, category_names):
+    rows = (
+        db.session.query(*TRANSACTION_ITEM.columns)
+        .filter(Transaction.user_id == user_id)
+        .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+        .limit(per_page)
+        .offset(page * per_page)
+        .all()
+    )
+    return TRANSACTION_ITEM.dump_all(rows, category_name=category_names)
+
+
+def rows_per_second(fn, pages, per_page):
+    start = time.perf_counter()
+    for page in range(pages):
+        fn(page)
+    return pages * per_page / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="交易记录总数")
+    parser.add_argument("--per-page", type=int, default=500, help="每页行数")
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        TESTING = True
+        # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+        ADVICE_JOB_BACKEND = "memory"
+        RESPONSE_CACHE_BACKEND = "memory"
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+    app = create_app(BenchConfig)
+    stdlib = DefaultJSONProvider(app)
+    fast = json_provider.OrjsonProvider(app) if json_provider.orjson else None
+    pages = args.rows // args.per_page
+
+    with app.app_context():
+        db.create_all()
+        user_id = populate(args.rows)
+        names = category_cache.names_for_user(user_id)
+        print(f"{args.rows} rows, {pages} pages of {args.per_page}")
+
+        def pipeline(fetch, provider):
+            def run(page):
+                items = fetch(user_id, args.per_page, page, names)
+                provider.response({"items": items}).get_data()
+                db.session.rollback()
+
+            return run
+
+        cases = [
+            ("orm+dict", pipeline(page_orm, stdlib)),
+            ("columns", pipeline(page_columns, stdlib)),
+        ]
+        if fast is not None:
+            cases.append(("columns+orjson", pipeline(page_columns, fast)))
+        print(f"{'end to end':18}{'rows/s':>12}")
+        for label, run in cases:
+            rate = rows_per_second(run, pages, args.per_page)
+            print(f"{label:18}{rate:12,.0f}")
+
+        # 分步: 固定一页数据，只测序列化或只测编码
+        sample = page_columns(user_id, args.per_page, 0, names)
+        print(f"{'single step':18}{'rows/s':>12}")
+        steps = [
+            ("fetch+dump orm", lambda _: page_orm(user_id, args.per_page, 0, names)),
+            (
+                "fetch+dump columns",
+                lambda _: page_columns(user_id, args.per_page, 0, names),
+            ),
+            ("encode stdlib", lambda _: stdlib.response({"items": sample})),
+        ]
+        if fast is not None:
+            steps.append(("encode orjson", lambda _: fast.response({"items": sample})))
+        for label, run in steps:
+            rate = rows_per_second(run, pages, args.per_page)
+            print(f"{label:18}{rate:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
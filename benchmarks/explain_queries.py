@@ -0,0 +1,222 @@
+"""检查各接口发出的 SQL 是否都能命中索引。
+
+脚本会在临时 SQLite 数据库上执行全部迁移并写入一批样例数据，
+然后通过 Flask 测试客户端依次调用各个接口，捕获它们实际发出的 SQL，
+逐条执行 EXPLAIN QUERY PLAN。只要有任何一条语句对业务表做了全表扫描，
+或者有接口返回了非 2xx 状态码 (此时捕获到的查询计划不完整)，
+脚本就以非零状态码退出，方便放进 CI。
+
+用法:
+    python benchmarks/explain_queries.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_migrate import upgrade
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Category, Transaction, User
+from config import Config, basedir
+
+# "SCAN transactions" 表示全表扫描；"SCAN transactions USING INDEX ..." 则是索引扫描
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+class ExplainConfig(Config):
+    TESTING = True
+    # 单进程运行，任务状态和响应缓存不写到 instance/ 下的共享文件
+    ADVICE_JOB_BACKEND = "memory"
+    RESPONSE_CACHE_BACKEND = "memory"
+    ADVICE_BACKEND = "stub"
+
+
+def seed(user_count=3, tx_per_user=200):
+    categories = [Category(name=f"默认{i}", is_custom=False) for i in range(5)]
+    db.session.add_all(categories)
+    users = []
+    for i in range(user_count):
+        user = User(username=f"explain{i}")
+        user.set_password("password")
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+
+    today = date.today()
+    for user in users:
+        db.session.add(Category(name="自定义", is_custom=True, user_id=user.id))
+        for n in range(tx_per_user):
+            is_expense = n % 4 != 0
+            db.session.add(
+                Transaction(
+                    user_id=user.id,
+                    amount=f"{(n % 97) + 0.5:.2f}",
+                    type="expense" if is_expense else "income",
+                    transaction_date=today - timedelta(days=n % 90),
+                    notes=f"note {n}",
+                    category_id=categories[n % 5].id if is_expense else None,
+                )
+            )
+    db.session.commit()
+    return users[0]
+
+
+def drive_endpoints(client, headers, category_id):
+    """依次调用各接口；返回 (接口描述, 响应状态码) 列表"""
+    today = date.today().isoformat()
+    calls = []
+
+    def call(method, url, **kwargs):
+        response = client.open(url, method=method, headers=headers, **kwargs)
+        response.get_data()  # 把流式响应读完，确保查询都已执行
+        calls.append((f"{method} {url}", response.status_code))
+        return response
+
+    call("GET", "/api/transactions?page=1&per_page=10")
+    call("GET", "/api/transactions?page=5&per_page=10")
+    first = call("GET", "/api/transactions?cursor=&per_page=10&include_total=1")
+    call("GET", f"/api/transactions?cursor={first.get_json()['next_cursor']}")
+    # 各种过滤/排序组合
+    for params in (
+        f"start=2000-01-01&end={today}",
+        "type=expense",
+        f"type=expense&category_id={category_id}",
+        f"category_id={category_id}&sort=date",
+        "min_amount=10&max_amount=50&sort=-amount",
+        "sort=amount&type=income",
+    ):
+        page = call("GET", f"/api/transactions?cursor=&per_page=10&{params}")
+        if page.get_json()["next_cursor"]:
+            call(
+                "GET",
+                f"/api/transactions?cursor={page.get_json()['next_cursor']}&{params}",
+            )
+    call("GET", "/api/transactions?page=2&per_page=10&type=expense&sort=amount")
+    call("GET", "/api/transactions/search?q=note")
+    call("GET", f"/api/transactions/export?format=csv&start=2000-01-01&end={today}")
+    created = call(
+        "POST",
+        "/api/transactions",
+        json={
+            "amount": "12.30",
+            "type": "expense",
+            "transaction_date": today,
+            "category_id": category_id,
+        },
+    )
+    tx_id = created.get_json()["id"]
+    call("GET", f"/api/transactions/{tx_id}")
+    call("PUT", f"/api/transactions/{tx_id}", json={"notes": "updated"})
+    call("DELETE", f"/api/transactions/{tx_id}")
+    batch_ids = [
+        call(
+            "POST",
+            "/api/transactions",
+            json={"amount": "1.00", "type": "income", "transaction_date": today},
+        ).get_json()["id"]
+        for _ in range(2)
+    ]
+    call(
+        "POST",
+        "/api/transactions/batch",
+        json={
+            "operations": [
+                {"op": "update", "id": batch_ids[0], "fields": {"notes": "batch"}},
+                {"op": "delete", "id": batch_ids[1]},
+            ]
+        },
+    )
+
+    call("GET", "/api/categories")
+    new_category = call("POST", "/api/categories", json={"name": "临时"})
+    new_id = new_category.get_json()["id"]
+    call("PUT", f"/api/categories/{new_id}", json={"name": "临时2"})
+    call("DELETE", f"/api/categories/{new_id}")
+
+    call("GET", "/api/dashboard/summary")
+    job = call(
+        "POST",
+        "/api/advice",
+        json={"start_date": "2000-01-01", "end_date": today},
+    )
+    call("GET", f"/api/advice/jobs/{job.get_json()['job_id']}")
+    return calls
+
+
+def main():
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    ExplainConfig.SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+
+    app = create_app(ExplainConfig)
+    statements = []
+    failures = []
+
+    try:
+        with app.app_context():
+            upgrade(directory=os.path.join(basedir, "migrations"))
+            user = seed()
+            category_id = Category.query.filter(Category.user_id.is_(None)).first().id
+            login = app.test_client().post(
+                "/api/login", json={"username": user.username, "password": "password"}
+            )
+            headers = {"Authorization": f"Bearer {login.get_json()['token']}"}
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if not executemany and statement.lstrip().upper().startswith(
+                    ("SELECT", "UPDATE", "DELETE")
+                ):
+                    statements.append((statement, parameters))
+
+            event.listen(db.engine, "before_cursor_execute", capture)
+            try:
+                calls = drive_endpoints(app.test_client(), headers, category_id)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", capture)
+
+            for endpoint, status in calls:
+                print(f"{status}  {endpoint}")
+
+            seen = set()
+            with db.engine.connect() as conn:
+                for statement, parameters in statements:
+                    if statement in seen:
+                        continue
+                    seen.add(statement)
+                    plan = conn.exec_driver_sql(
+                        "EXPLAIN QUERY PLAN " + statement, parameters
+                    ).fetchall()
+                    details = [row[-1] for row in plan]
+                    scans = [d for d in details if FULL_SCAN.match(d)]
+                    print("\n" + " ".join(statement.split()))
+                    for detail in details:
+                        print(f"    {detail}")
+                    if scans:
+                        failures.append((statement, scans))
+    finally:
+        os.remove(db_path)
+
+    print(f"\n{len(seen)} distinct statements explained.")
+    errors = [(endpoint, status) for endpoint, status in calls if status >= 300]
+    if errors:
+        print(f"{len(errors)} call(s) did not return 2xx:")
+        for endpoint, status in errors:
+            print(f"  - {status}  {endpoint}")
+    if failures:
+        print(f"{len(failures)} statement(s) still do a full table scan:")
+        for statement, scans in failures:
+            print(f"  - {', '.join(scans)}: {' '.join(statement.split())[:120]}")
+    if errors or failures:
+        return 1
+    print("No full table scans.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,109 @@ class Config:
         "DATABASE_URL"
     ) or "sqlite:///" + os.path.join(basedir, "app.db")
 
+    # 只读副本；设置后被 @read_only 标记的接口把查询发往副本 (见 app/db_routing.py)。
+    # 用户写入后、副本同步前仍读主库，判断依据保存在响应缓存后端中
+    REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+
     # 关闭 SQLAlchemy 的事件通知系统，以节省资源
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DASHSCOPE_API_KEY = os.environ.get("DASHSCOPE_API_KEY")
+
+    # 分类缓存的有效期(秒)。本进程内的写操作会立即失效缓存，
+    # TTL 只用于兜底多进程部署时其他 worker 的修改
+    CATEGORY_CACHE_TTL = int(os.environ.get("CATEGORY_CACHE_TTL", 60))
+
+    # 接口响应缓存: 默认 "sqlite"，通过 RESPONSE_CACHE_PATH 指定的文件
+    # (默认 instance/response_cache.db) 在多个 worker 之间共享缓存和数据版本号；
+    # "memory" 为进程内 LRU，版本号不跨进程，只能用于单进程部署
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "sqlite")
+    RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH")
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+
+    # 已验证 Token 的缓存，命中时不再校验签名和查询用户；设为 0 关闭缓存
+    TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 300))
+    TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+    # bcrypt 代价因子；修改后，用户下次登录成功时会自动用新的代价因子重新哈希
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    # 哈希线程池大小 (默认 CPU 核数) 与排队上限 (默认线程数的 4 倍)，排满后返回 503
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0)) or None
+    PASSWORD_HASH_QUEUE_LIMIT = (
+        int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", 0)) or None
+    )
+
+    # AI 建议缓存: 同一份聚合数据在有效期内直接返回已生成的建议
+    ADVICE_CACHE_TTL = int(os.environ.get("ADVICE_CACHE_TTL", 3600))
+    ADVICE_CACHE_MAX_ENTRIES = int(os.environ.get("ADVICE_CACHE_MAX_ENTRIES", 512))
+
+    # AI 建议的生成后端: "dashscope" 调用通义千问；"stub" 为本地假后端，
+    # 按 ADVICE_STUB_LATENCY 秒延迟后返回，供测试使用
+    ADVICE_BACKEND = os.environ.get("ADVICE_BACKEND", "dashscope")
+    ADVICE_STUB_LATENCY = float(os.environ.get("ADVICE_STUB_LATENCY", 0))
+    # 后台生成任务的并发数与同时进行中的任务上限 (超出时返回 503)
+    ADVICE_WORKERS = int(os.environ.get("ADVICE_WORKERS", 4))
+    ADVICE_QUEUE_LIMIT = int(os.environ.get("ADVICE_QUEUE_LIMIT", 32))
+    # 任务状态的保存时间 (秒) 与条数上限；须长于最慢的一次生成
+    # (排队 + (LLM_MAX_RETRIES + 1) 次 LLM_READ_TIMEOUT + 退避)。
+    # ADVICE_JOB_BACKEND 默认为 "sqlite"，保存在 ADVICE_JOB_STORE_PATH
+    # (默认 instance/advice_jobs.db)，所有 worker 共享；"memory" 只在当前进程内可见，
+    # 多个 gunicorn worker 时轮询会落到查不到任务的进程，只能用于单进程部署
+    ADVICE_JOB_BACKEND = os.environ.get("ADVICE_JOB_BACKEND", "sqlite")
+    ADVICE_JOB_TTL = int(os.environ.get("ADVICE_JOB_TTL", 3600))
+    ADVICE_JOB_MAX_ENTRIES = int(os.environ.get("ADVICE_JOB_MAX_ENTRIES", 10000))
+    ADVICE_JOB_STORE_PATH = os.environ.get("ADVICE_JOB_STORE_PATH")
+
+    # 大模型客户端: 接口地址 (测试时可指向本地假服务)、连接/读取超时 (秒)、
+    # 连接池大小、失败重试次数及退避基数 (秒)、同时进行中的请求上限，
+    # 以及等待空闲名额的最长时间 (秒)
+    LLM_BASE_URL = os.environ.get(
+        "LLM_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    )
+    LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 5))
+    LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", 60))
+    LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", 10))
+    LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+    LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", 0.5))
+    LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+    LLM_ACQUIRE_TIMEOUT = float(os.environ.get("LLM_ACQUIRE_TIMEOUT", 5))
+
+    # 数据库引擎配置: "production" 时按数据库类型设置连接池参数，
+    # 并在 SQLite 的每个连接上开启 WAL 等 PRAGMA (见 app/db_tuning.py)；
+    # "default" 时使用 SQLAlchemy 的默认设置
+    DB_ENGINE_PROFILE = os.environ.get("DB_ENGINE_PROFILE", "production")
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    # 等待写锁的毫秒数
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    # 内存映射的字节数 (256 MB)
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 268435456))
+    # 负数表示以 KiB 为单位 (64 MB)
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -64000))
+    SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+
+    # 响应 JSON 编码器: auto (装有 orjson 时使用 orjson) | orjson | stdlib，见 app/json_provider.py
+    JSON_ENCODER = os.environ.get("JSON_ENCODER", "auto")
+
+    # 响应压缩 (gzip；安装了 brotli 包时优先 br)，只压缩超过 COMPRESS_MIN_SIZE 字节的响应
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 4))
+
+    # 运行指标 (GET /api/metrics，Prometheus 文本格式)，见 app/instrumentation.py。
+    # METRICS_SLOW_REQUEST_MS > 0 时记录慢请求日志，同一语句在一个请求内执行
+    # 达到 METRICS_N_PLUS_ONE_THRESHOLD 次时标记为疑似 N+1。
+    # 抓取时需要带上 Authorization: Bearer <METRICS_TOKEN>；未设置 METRICS_TOKEN 时
+    # 接口返回 404，不对外暴露各路由的流量和 SQL 耗时
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_SLOW_REQUEST_MS = int(os.environ.get("METRICS_SLOW_REQUEST_MS", 0))
+    METRICS_N_PLUS_ONE_THRESHOLD = int(
+        os.environ.get("METRICS_N_PLUS_ONE_THRESHOLD", 5)
+    )
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
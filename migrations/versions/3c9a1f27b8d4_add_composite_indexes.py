@@ -0,0 +1,30 @@
+"""Add composite indexes for per-user transaction queries.
+
+Revision ID: 3c9a1f27b8d4
+Revises: e1b1b5d6f5de
+Create Date: 2026-10-18 09:12:31.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9a1f27b8d4'
+down_revision = 'e1b1b5d6f5de'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_user_date_id', 'transactions', ['user_id', 'transaction_date', 'id'], unique=False)
+    op.create_index('ix_transactions_user_type_date', 'transactions', ['user_id', 'type', 'transaction_date', 'category_id', 'amount'], unique=False)
+    op.create_index('ix_transactions_category_id', 'transactions', ['category_id'], unique=False)
+    op.create_index('ix_categories_user_id', 'categories', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_categories_user_id', table_name='categories')
+    op.drop_index('ix_transactions_category_id', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_date_id', table_name='transactions')
@@ -0,0 +1,26 @@
+"""Add indexes for filtered and amount-sorted transaction lists.
+
+Revision ID: 5b7e2c9d4f10
+Revises: 8f2d6c41a7e0
+Create Date: 2026-10-18 14:05:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9d4f10'
+down_revision = '8f2d6c41a7e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_user_category_date_id', 'transactions', ['user_id', 'category_id', 'transaction_date', 'id'], unique=False)
+    op.create_index('ix_transactions_user_amount_id', 'transactions', ['user_id', 'amount', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_amount_id', table_name='transactions')
+    op.drop_index('ix_transactions_user_category_date_id', table_name='transactions')
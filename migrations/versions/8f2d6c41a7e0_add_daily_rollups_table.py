@@ -0,0 +1,47 @@
+"""Add daily_rollups pre-aggregated table.
+
+Revision ID: 8f2d6c41a7e0
+Revises: 3c9a1f27b8d4
+Create Date: 2026-10-18 10:03:47.215604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2d6c41a7e0'
+down_revision = '3c9a1f27b8d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_daily_rollups_key', 'daily_rollups', ['user_id', 'date', 'type', 'category_id'], unique=True)
+    op.create_index('ix_daily_rollups_category_id', 'daily_rollups', ['category_id'], unique=False)
+
+    # 用已有的交易记录回填汇总表
+    op.execute(
+        "INSERT INTO daily_rollups (user_id, date, type, category_id, total, count) "
+        "SELECT user_id, transaction_date, type, category_id, SUM(amount), COUNT(id) "
+        "FROM transactions "
+        "GROUP BY user_id, transaction_date, type, category_id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_daily_rollups_category_id', table_name='daily_rollups')
+    op.drop_index('ux_daily_rollups_key', table_name='daily_rollups')
+    op.drop_table('daily_rollups')
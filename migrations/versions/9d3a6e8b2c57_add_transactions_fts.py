@@ -0,0 +1,56 @@
+"""Add FTS5 index over transaction notes.
+
+Revision ID: 9d3a6e8b2c57
+Revises: 5b7e2c9d4f10
+Create Date: 2026-10-18 15:20:44.871035
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3a6e8b2c57'
+down_revision = '5b7e2c9d4f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 只在 SQLite 上可用，其他数据库由 app/search.py 退回 LIKE 查询
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+        "notes, user_id, content='transactions', content_rowid='id', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+        "INSERT INTO transactions_fts(rowid, notes, user_id) "
+        "VALUES (new.id, new.notes, new.user_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+        "INSERT INTO transactions_fts(transactions_fts, rowid, notes, user_id) "
+        "VALUES ('delete', old.id, old.notes, old.user_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER transactions_fts_au AFTER UPDATE OF notes, user_id ON transactions BEGIN "
+        "INSERT INTO transactions_fts(transactions_fts, rowid, notes, user_id) "
+        "VALUES ('delete', old.id, old.notes, old.user_id); "
+        "INSERT INTO transactions_fts(rowid, notes, user_id) "
+        "VALUES (new.id, new.notes, new.user_id); END"
+    )
+    # 用已有的备注回填索引
+    op.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS transactions_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS transactions_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS transactions_fts_ai")
+    op.execute("DROP TABLE IF EXISTS transactions_fts")
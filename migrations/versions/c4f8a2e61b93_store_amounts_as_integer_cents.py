@@ -0,0 +1,82 @@
+"""Store transaction amounts and rollup totals as integer cents.
+
+Revision ID: c4f8a2e61b93
+Revises: 9d3a6e8b2c57
+Create Date: 2026-10-18 17:02:19.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f8a2e61b93'
+down_revision = '9d3a6e8b2c57'
+branch_labels = None
+depends_on = None
+
+# 与 9d3a6e8b2c57 中的触发器一致。SQLite 上 batch_alter_table 会重建 transactions 表，
+# 表上的触发器随旧表一起被删除，需要重新创建 (id 原样复制，FTS 索引本身不受影响)
+FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, notes, user_id) "
+    "VALUES (new.id, new.notes, new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, notes, user_id) "
+    "VALUES ('delete', old.id, old.notes, old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF notes, user_id ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, notes, user_id) "
+    "VALUES ('delete', old.id, old.notes, old.user_id); "
+    "INSERT INTO transactions_fts(rowid, notes, user_id) "
+    "VALUES (new.id, new.notes, new.user_id); END",
+]
+
+
+def _restore_fts_triggers():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite' and sa.inspect(bind).has_table('transactions_fts'):
+        for statement in FTS_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    # 包含 amount 的索引先删除，换成 amount_cents 后重建
+    op.drop_index('ix_transactions_user_amount_id', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
+
+    op.add_column('transactions', sa.Column('amount_cents', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE transactions SET amount_cents = CAST(ROUND(amount * 100) AS BIGINT)")
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.alter_column('amount_cents', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.drop_column('amount')
+
+    op.create_index('ix_transactions_user_type_date', 'transactions', ['user_id', 'type', 'transaction_date', 'category_id', 'amount_cents'], unique=False)
+    op.create_index('ix_transactions_user_amount_id', 'transactions', ['user_id', 'amount_cents', 'id'], unique=False)
+    _restore_fts_triggers()
+
+    op.add_column('daily_rollups', sa.Column('total_cents', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE daily_rollups SET total_cents = CAST(ROUND(total * 100) AS BIGINT)")
+    with op.batch_alter_table('daily_rollups') as batch_op:
+        batch_op.alter_column('total_cents', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.drop_column('total')
+
+
+def downgrade():
+    op.add_column('daily_rollups', sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=True))
+    op.execute("UPDATE daily_rollups SET total = total_cents / 100.0")
+    with op.batch_alter_table('daily_rollups') as batch_op:
+        batch_op.alter_column('total', existing_type=sa.Numeric(precision=14, scale=2), nullable=False)
+        batch_op.drop_column('total_cents')
+
+    op.drop_index('ix_transactions_user_amount_id', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
+
+    op.add_column('transactions', sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.execute("UPDATE transactions SET amount = amount_cents / 100.0")
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.alter_column('amount', existing_type=sa.Numeric(precision=10, scale=2), nullable=False)
+        batch_op.drop_column('amount_cents')
+
+    op.create_index('ix_transactions_user_type_date', 'transactions', ['user_id', 'type', 'transaction_date', 'category_id', 'amount'], unique=False)
+    op.create_index('ix_transactions_user_amount_id', 'transactions', ['user_id', 'amount', 'id'], unique=False)
+    _restore_fts_triggers()